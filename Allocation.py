@@ -0,0 +1,333 @@
+import time
+from datetime import datetime
+from collections import defaultdict, deque
+import mysql.connector
+from Blood_Types import BLOOD_COMPATIBILITY
+from Database import get_connection, release
+from Inventory import get_ledger
+from Analytics_Data import mark_changed
+
+# How many recipient groups each donor type can serve. Spending a widely compatible
+# type (O-) on a substitute match costs more than spending a narrow one (AB-).
+SUBSTITUTE_COST = {
+    donor_type: sum(donor_type in donors for donors in BLOOD_COMPATIBILITY.values())
+    for donor_type in BLOOD_COMPATIBILITY
+}
+
+ER_LOCK_DEADLOCK = 1213
+# Keep IN (...) lists well under max_allowed_packet
+ID_BATCH_SIZE = 1000
+
+
+class AllocationPlan:
+    def __init__(self):
+        self.allocations = {}   # request_id -> [blood_id, ...]
+        self.unfulfilled = []   # request_ids that could not be met in full
+
+    @property
+    def units_allocated(self):
+        return sum(len(ids) for ids in self.allocations.values())
+
+
+class MinCostFlow:
+    # Successive shortest paths; the type graph has 18 nodes so Bellman-Ford is plenty
+    def __init__(self, node_count):
+        self.graph = [[] for _ in range(node_count)]
+
+    def add_edge(self, u, v, capacity, cost):
+        self.graph[u].append([v, capacity, cost, len(self.graph[v])])
+        self.graph[v].append([u, 0, -cost, len(self.graph[u]) - 1])
+        return u, len(self.graph[u]) - 1
+
+    def flow_on(self, edge_ref):
+        u, index = edge_ref
+        v, _, _, rev = self.graph[u][index]
+        return self.graph[v][rev][1]
+
+    def solve(self, source, sink):
+        total_flow = total_cost = 0
+        node_count = len(self.graph)
+        while True:
+            dist = [None] * node_count
+            prev = [None] * node_count
+            dist[source] = 0
+            for _ in range(node_count - 1):
+                updated = False
+                for u in range(node_count):
+                    if dist[u] is None:
+                        continue
+                    for index, (v, capacity, cost, _) in enumerate(self.graph[u]):
+                        if capacity > 0 and (dist[v] is None or dist[u] + cost < dist[v]):
+                            dist[v] = dist[u] + cost
+                            prev[v] = (u, index)
+                            updated = True
+                if not updated:
+                    break
+            if dist[sink] is None:
+                return total_flow, total_cost
+
+            pushed = None
+            v = sink
+            while v != source:
+                u, index = prev[v]
+                capacity = self.graph[u][index][1]
+                pushed = capacity if pushed is None else min(pushed, capacity)
+                v = u
+            v = sink
+            while v != source:
+                u, index = prev[v]
+                edge = self.graph[u][index]
+                edge[1] -= pushed
+                self.graph[v][edge[3]][1] += pushed
+                v = u
+            total_flow += pushed
+            total_cost += pushed * dist[sink]
+
+
+def solve_type_quotas(demand, supply):
+    # Max units moved from donor types to recipient types at minimum substitution cost.
+    # Returns {recipient_type: {donor_type: units}}
+    types = sorted(BLOOD_COMPATIBILITY)
+    recipient_node = {t: 1 + i for i, t in enumerate(types)}
+    donor_node = {t: 1 + len(types) + i for i, t in enumerate(types)}
+    source, sink = 0, 1 + 2 * len(types)
+    network = MinCostFlow(sink + 1)
+    unbounded = sum(supply.values())
+
+    edges = {}
+    for recipient in types:
+        if demand.get(recipient, 0) > 0:
+            network.add_edge(source, recipient_node[recipient], demand[recipient], 0)
+        for donor in BLOOD_COMPATIBILITY[recipient]:
+            cost = 0 if donor == recipient else SUBSTITUTE_COST[donor]
+            edges[recipient, donor] = network.add_edge(recipient_node[recipient], donor_node[donor], unbounded, cost)
+    for donor in types:
+        if supply.get(donor, 0) > 0:
+            network.add_edge(donor_node[donor], sink, supply[donor], 0)
+
+    network.solve(source, sink)
+
+    quotas = defaultdict(dict)
+    for (recipient, donor), edge_ref in edges.items():
+        flow = network.flow_on(edge_ref)
+        if flow > 0:
+            quotas[recipient][donor] = flow
+    return quotas
+
+
+def plan_allocation(requests, units):
+    # requests: (request_id, blood_type, units_requested) in priority order
+    # units: (blood_id, blood_type, expiration_date) for active, unexpired bags
+    stock = defaultdict(list)
+    for blood_id, blood_type, expiration_date in units:
+        stock[blood_type].append((expiration_date, blood_id))
+    # First-expiring first, so the bags closest to expiry are the ones that get used
+    stock = {blood_type: deque(blood_id for _, blood_id in sorted(queue)) for blood_type, queue in stock.items()}
+
+    plan = AllocationPlan()
+    waiting = [r for r in requests if r[2] and r[2] > 0 and r[1] in BLOOD_COMPATIBILITY]
+
+    # Requests are all-or-nothing, so solve the flow, hand out whole requests in
+    # priority order, then re-solve for whatever is left with the remaining stock.
+    while waiting:
+        demand = defaultdict(int)
+        for _, blood_type, units_needed in waiting:
+            demand[blood_type] += units_needed
+        supply = {blood_type: len(queue) for blood_type, queue in stock.items()}
+        quotas = solve_type_quotas(demand, supply)
+
+        still_waiting = []
+        for request_id, blood_type, units_needed in waiting:
+            quota = quotas.get(blood_type, {})
+            if sum(quota.values()) < units_needed:
+                still_waiting.append((request_id, blood_type, units_needed))
+                continue
+
+            claimed = []
+            for donor in sorted(quota, key=lambda d: 0 if d == blood_type else SUBSTITUTE_COST[d]):
+                take = min(quota[donor], units_needed - len(claimed))
+                claimed.extend(stock[donor].popleft() for _ in range(take))
+                quota[donor] -= take
+                if len(claimed) == units_needed:
+                    break
+            plan.allocations[request_id] = claimed
+
+        if len(still_waiting) == len(waiting):
+            break
+        waiting = still_waiting
+
+    plan.unfulfilled = [request_id for request_id, _, _ in waiting]
+    return plan
+
+
+def _batches(items):
+    for start in range(0, len(items), ID_BATCH_SIZE):
+        yield items[start:start + ID_BATCH_SIZE]
+
+
+def load_pending_requests(cursor, request_ids=None, lock=False):
+    if request_ids is None:
+        cursor.execute("""
+            SELECT id, blood_type, units_requested
+            FROM blood_requests
+            WHERE status = 'pending'
+            ORDER BY id
+        """)
+        return cursor.fetchall()
+
+    locking = " FOR UPDATE" if lock else ""
+    pending = []
+    for batch in _batches(list(request_ids)):
+        placeholders = ', '.join(['%s'] * len(batch))
+        cursor.execute(f"""
+            SELECT id, blood_type, units_requested
+            FROM blood_requests
+            WHERE id IN ({placeholders}) AND status = 'pending'{locking}
+        """, batch)
+        pending.extend(cursor.fetchall())
+    return sorted(pending)
+
+
+def load_active_units(cursor, blood_types, today):
+    # Every usable unit of every compatible type: the global solve over the whole backlog
+    donor_types = sorted({donor for t in blood_types if t in BLOOD_COMPATIBILITY for donor in BLOOD_COMPATIBILITY[t]})
+    if not donor_types:
+        return []
+    placeholders = ', '.join(['%s'] * len(donor_types))
+    cursor.execute(f"""
+        SELECT blood_id, blood_type, expiration_date
+        FROM units2
+        WHERE status = 'active'
+        AND blood_type IN ({placeholders})
+        AND expiration_date > %s
+    """, donor_types + [today])
+    return cursor.fetchall()
+
+
+def candidate_limits(requests):
+    # donor type -> units the requests' compatible lines ask for. The planner draws each type
+    # first-expiring first, so it never takes more than this many units of it.
+    limits = defaultdict(int)
+    for _, blood_type, units_needed in requests:
+        if not units_needed or units_needed <= 0:
+            continue
+        for donor in BLOOD_COMPATIBILITY.get(blood_type, ()):
+            limits[donor] += units_needed
+    return dict(limits)
+
+
+def load_candidate_units(cursor, requests, today, lock=False):
+    # One order's candidates: the first-expiring candidate_limits() units of each type, one
+    # short index range scan per type (status, blood_type, expiration_date) however large the
+    # inventory is. Locked, SKIP LOCKED lets parallel stations claim different bags instead
+    # of waiting on each other.
+    locking = " FOR UPDATE SKIP LOCKED" if lock else ""
+    units = []
+    for donor, limit in sorted(candidate_limits(requests).items()):
+        cursor.execute(f"""
+            SELECT blood_id, blood_type, expiration_date
+            FROM units2
+            WHERE status = 'active'
+            AND blood_type = %s
+            AND expiration_date > %s
+            ORDER BY expiration_date
+            LIMIT %s{locking}
+        """, (donor, today, limit))
+        units.extend(cursor.fetchall())
+    return units
+
+
+def apply_plan(cursor, connection, plan):
+    request_ids = list(plan.allocations)
+    blood_ids = [blood_id for ids in plan.allocations.values() for blood_id in ids]
+    if not request_ids:
+        return True
+
+    try:
+        # Lock everything the plan touches; if another station got there first the plan is stale.
+        # Status is checked here rather than in the WHERE clause so the lookup can only go
+        # through the primary key (SQLite would otherwise walk the status index).
+        locked_requests = locked_units = 0
+        for batch in _batches(request_ids):
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f"SELECT status FROM blood_requests WHERE id IN ({placeholders}) FOR UPDATE", batch)
+            locked_requests += sum(status == 'pending' for status, in cursor.fetchall())
+        for batch in _batches(blood_ids):
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f"SELECT status FROM units2 WHERE blood_id IN ({placeholders}) FOR UPDATE", batch)
+            locked_units += sum(status == 'active' for status, in cursor.fetchall())
+        if locked_requests != len(request_ids) or locked_units != len(blood_ids):
+            connection.rollback()
+            return False
+
+        for batch in _batches(blood_ids):
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f"UPDATE units2 SET status = 'used' WHERE blood_id IN ({placeholders})", batch)
+        cursor.executemany("INSERT INTO request_allocations (request_id, blood_id) VALUES (%s, %s)",
+                           [(request_id, blood_id) for request_id, ids in plan.allocations.items() for blood_id in ids])
+        for batch in _batches(request_ids):
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f"UPDATE blood_requests SET status = 'approved' WHERE id IN ({placeholders})", batch)
+        connection.commit()
+        get_ledger().remove(blood_ids)
+        mark_changed('units2', 'blood_requests')
+        return True
+    except mysql.connector.Error:
+        connection.rollback()
+        raise
+
+
+def allocate_requests(cursor, connection, request_ids=None, attempts=3):
+    start = time.perf_counter()
+    today = datetime.today().date()
+    for attempt in range(1, attempts + 1):
+        # Start from a fresh snapshot so a retry sees what the other station committed
+        connection.rollback()
+        # Every station reaches for the same first-expiring bags, so under heavy contention an
+        # optimistic plan can keep losing. An order's last attempt claims its candidates with
+        # SKIP LOCKED and plans over what it holds; the backlog is retried by its next run.
+        lock = request_ids is not None and attempt == attempts
+        requests = load_pending_requests(cursor, request_ids, lock)
+        if not requests:
+            print("No pending requests to allocate.")
+            return AllocationPlan()
+        if request_ids is None:
+            units = load_active_units(cursor, {r[1] for r in requests}, today)
+        else:
+            units = load_candidate_units(cursor, requests, today, lock)
+        plan = plan_allocation(requests, units)
+
+        try:
+            applied = apply_plan(cursor, connection, plan)
+        except mysql.connector.Error as err:
+            if err.errno != ER_LOCK_DEADLOCK:
+                raise
+            applied = False
+        if applied:
+            elapsed = time.perf_counter() - start
+            print(f"✅ Allocated {plan.units_allocated} units to {len(plan.allocations)} requests "
+                  f"({len(plan.unfulfilled)} unfulfilled) in {elapsed:.2f}s")
+            return plan
+        print(f"⚠ Inventory changed during allocation, replanning (attempt {attempt}/{attempts})...")
+
+    print("❌ Could not allocate requests: inventory kept changing")
+    plan = AllocationPlan()
+    plan.unfulfilled = [r[0] for r in requests]
+    return plan
+
+
+def allocate_pending_requests():
+    connection = cursor = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+        return allocate_requests(cursor, connection)
+    except mysql.connector.Error as err:
+        print(f"❌ Database error: {err}")
+        return AllocationPlan()
+    finally:
+        release(connection, cursor)
+
+
+if __name__ == "__main__":
+    allocate_pending_requests()
@@ -0,0 +1,290 @@
+import os
+import time
+import threading
+from functools import lru_cache
+from collections import defaultdict
+from Blood_Types import VALID_BLOOD_GROUPS
+from Database import get_connection, release
+
+# Where the analytics come from: the live MySQL tables by default, or the CSV snapshots with
+# BLOOD_BANK_ANALYTICS_SOURCE=csv. CSV paths can be set one by one, or all at once through
+# BLOOD_BANK_DATA_DIR.
+ANALYTICS_DATA_DIR = os.environ.get('BLOOD_BANK_DATA_DIR', r"C:\Users\LENOVO\Desktop\Blood_Bank_System")
+ANALYTICS_SOURCE = os.environ.get('BLOOD_BANK_ANALYTICS_SOURCE', 'mysql')
+CSV_DATE_FORMAT = '%d-%m-%Y'
+# Oldest a cached MySQL frame may get; the backstop for edits the server fingerprint misses
+DATASET_TTL = float(os.environ.get('BLOOD_BANK_DATASET_TTL', 300))
+# Other stations' writes are noticed within this many seconds; this process's own writes
+# go through mark_changed and show up immediately
+FINGERPRINT_INTERVAL = float(os.environ.get('BLOOD_BANK_FINGERPRINT_INTERVAL', 5))
+
+# pandas is imported inside the functions that use it: mark_changed is called from every
+# write path, and importing this module should not pull in pandas for it.
+@lru_cache(maxsize=None)
+def blood_type_dtype():
+    import pandas as pd
+    return pd.CategoricalDtype(sorted(VALID_BLOOD_GROUPS))
+
+
+DATASETS = {
+    'donors': {
+        'file': 'Donor.csv',
+        'env': 'BLOOD_BANK_DONORS_CSV',
+        'table': 'donor_registration',
+        'key': 'donor_id',
+        'dtypes': {'donor_id': 'Int64', 'name': 'string', 'age': 'Int64', 'gender': 'category',
+                   'hemoglobin_count': 'float64', 'location': 'string', 'contact_number': 'string',
+                   'weight': 'float64', 'pulse_rate': 'Int64', 'blood_pressure': 'Int64',
+                   'chronic_disorders': 'Int64', 'elgibility': 'string'},
+        'dates': ['last_donation_date'],
+    },
+    'requests': {
+        'file': 'blood_requests .csv',
+        'env': 'BLOOD_BANK_REQUESTS_CSV',
+        'table': 'blood_requests',
+        'key': 'id',
+        'dtypes': {'id': 'Int64', 'location': 'string', 'hospital_name': 'string', 'contact_number': 'string',
+                   'status': 'category', 'units_requested': 'Int64'},
+        'dates': ['request_date'],
+    },
+    'units': {
+        'file': 'Blood_units_dataset.csv',
+        'env': 'BLOOD_BANK_UNITS_CSV',
+        'table': 'units2',
+        'key': 'blood_id',
+        'dtypes': {'blood_id': 'Int64', 'donor_id': 'Int64', 'quantity_ml': 'Int64', 'status': 'category'},
+        'dates': ['donation_date', 'expiration_date'],
+    },
+}
+
+_cache = {}                        # name -> (signature, DataFrame, loaded_at)
+_table_versions = defaultdict(int)  # table -> change counter, bumped by this process's writes
+_fingerprints = {}                 # table -> (server fingerprint, checked_at)
+_cache_lock = threading.Lock()
+
+
+def dataset_path(name):
+    spec = DATASETS[name]
+    return os.environ.get(spec['env'], os.path.join(ANALYTICS_DATA_DIR, spec['file']))
+
+
+def mark_changed(*tables):
+    # Called after commits that touch a table, so the next read from MySQL picks them up
+    with _cache_lock:
+        for table in tables:
+            _table_versions[table] += 1
+            # The write moved the fingerprint too; re-read it with the reload
+            _fingerprints.pop(table, None)
+
+
+def _server_fingerprint(spec):
+    # Other stations and the bulk importer write to the same tables, and mark_changed only
+    # sees this process's writes. Row count and highest id per status move with every insert,
+    # delete and status change; the queries are answered from the status / primary key indexes.
+    if 'status' in spec['dtypes']:
+        sql = f"SELECT status, COUNT(*), MAX({spec['key']}) FROM {spec['table']} GROUP BY status ORDER BY status"
+    else:
+        sql = f"SELECT COUNT(*), MAX({spec['key']}) FROM {spec['table']}"
+    return tuple(tuple(row) for row in _aggregate(sql))
+
+
+def _recent_fingerprint(spec):
+    # Dashboards call get_dataset several times per refresh; one fingerprint query per
+    # table per FINGERPRINT_INTERVAL is enough to notice other stations' writes
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _fingerprints.get(spec['table'])
+    if cached is not None and now - cached[1] < FINGERPRINT_INTERVAL:
+        return cached[0]
+    fingerprint = _server_fingerprint(spec)
+    with _cache_lock:
+        _fingerprints[spec['table']] = (fingerprint, now)
+    return fingerprint
+
+
+def _signature(name, source):
+    if source == 'mysql':
+        spec = DATASETS[name]
+        with _cache_lock:
+            version = _table_versions[spec['table']]
+        return ('mysql', spec['table'], version, _recent_fingerprint(spec))
+    path = dataset_path(name)
+    stat = os.stat(path)
+    return ('csv', path, stat.st_mtime_ns, stat.st_size)
+
+
+def _apply_types(df, spec, date_format=None):
+    import pandas as pd
+    dtypes = {column: dtype for column, dtype in spec['dtypes'].items() if column in df.columns}
+    df = df.astype(dtypes)
+    if 'blood_type' in df.columns:
+        df['blood_type'] = df['blood_type'].astype('string').str.strip().str.upper().astype(blood_type_dtype())
+    if 'status' in df.columns:
+        df['status'] = df['status'].astype('string').str.strip().str.lower().astype('category')
+    for column in spec['dates']:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], format=date_format, errors='coerce')
+    return df
+
+
+def read_dataset(name, source=None):
+    import pandas as pd
+    spec = DATASETS[name]
+    source = source or ANALYTICS_SOURCE
+    if source == 'mysql':
+        connection = get_connection()
+        try:
+            df = pd.read_sql(f"SELECT * FROM {spec['table']}", connection)
+        finally:
+            release(connection)
+        return _apply_types(df, spec)
+
+    df = pd.read_csv(dataset_path(name), skipinitialspace=True)
+    return _apply_types(df, spec, CSV_DATE_FORMAT)
+
+
+def get_dataset(name, source=None):
+    # The returned frame is shared between callers; copy it before changing it
+    source = source or ANALYTICS_SOURCE
+    try:
+        signature = _signature(name, source)
+        with _cache_lock:
+            cached = _cache.get(name)
+        # In-place edits that keep the fingerprint (a corrected name, say) show up after the TTL
+        if (cached is not None and cached[0] == signature
+                and (source != 'mysql' or time.monotonic() - cached[2] < DATASET_TTL)):
+            return cached[1]
+
+        df = read_dataset(name, source)
+        with _cache_lock:
+            _cache[name] = (signature, df, time.monotonic())
+        print(f"✅ Loaded {name} dataset ({len(df)} rows)")
+        return df
+    except Exception as e:
+        print(f"❌ Error loading {name} dataset: {e}")
+        return None
+
+
+def invalidate(name=None):
+    with _cache_lock:
+        for key in [k for k in _cache if name is None or k == name]:
+            del _cache[key]
+            _fingerprints.pop(DATASETS[key]['table'], None)
+
+
+# Dashboard aggregates. From MySQL they are GROUP BY queries answered from indexes, so
+# only a handful of rows come back however large the tables get; from CSV they are
+# computed over the cached frames.
+def _aggregate(sql):
+    connection = cursor = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+        cursor.execute(sql)
+        return cursor.fetchall()
+    finally:
+        release(connection, cursor)
+
+
+def donors_by_blood_type(source=None):
+    # Series: blood_type -> donors, largest first
+    import pandas as pd
+    source = source or ANALYTICS_SOURCE
+    if source == 'mysql':
+        rows = _aggregate("""
+            SELECT blood_type, COUNT(*)
+            FROM donor_registration
+            WHERE blood_type IS NOT NULL
+            GROUP BY blood_type
+        """)
+        counts = pd.Series({blood_type: count for blood_type, count in rows}, dtype='int64')
+    else:
+        df = get_dataset('donors', source)
+        if df is None:
+            return None
+        counts = df['blood_type'].value_counts(sort=False)
+        counts.index = counts.index.astype(str)
+    return counts[counts > 0].sort_values(ascending=False)
+
+
+def donations_by_month(source=None):
+    # Series: month Period -> donors whose last donation fell in that month, in date order
+    import pandas as pd
+    source = source or ANALYTICS_SOURCE
+    if source == 'mysql':
+        rows = _aggregate("""
+            SELECT YEAR(last_donation_date), MONTH(last_donation_date), COUNT(*)
+            FROM donor_registration
+            WHERE last_donation_date IS NOT NULL
+            GROUP BY YEAR(last_donation_date), MONTH(last_donation_date)
+        """)
+        counts = pd.Series({pd.Period(year=year, month=month, freq='M'): count for year, month, count in rows},
+                           dtype='int64')
+    else:
+        df = get_dataset('donors', source)
+        if df is None:
+            return None
+        counts = df['last_donation_date'].dt.to_period('M').value_counts()
+    return counts.sort_index()
+
+
+def requested_vs_available(source=None):
+    # DataFrame: blood_type, units_requested (all requests), units_available (active bags, 500 ml each)
+    import pandas as pd
+    source = source or ANALYTICS_SOURCE
+    if source == 'mysql':
+        requested = pd.DataFrame(_aggregate("""
+            SELECT blood_type, SUM(units_requested)
+            FROM blood_requests
+            GROUP BY blood_type
+        """), columns=['blood_type', 'units_requested'])
+        available = pd.DataFrame(_aggregate("""
+            SELECT blood_type, SUM(quantity_ml) / 500
+            FROM units2
+            WHERE status = 'active'
+            GROUP BY blood_type
+        """), columns=['blood_type', 'units_available'])
+    else:
+        requests_df = get_dataset('requests', source)
+        units_df = get_dataset('units', source)
+        if requests_df is None or units_df is None:
+            return None
+        requested = requests_df.groupby('blood_type', observed=True)['units_requested'].sum().reset_index()
+        active = units_df[units_df['status'] == 'active']
+        available = (active['quantity_ml'] / 500).groupby(active['blood_type'], observed=True).sum()
+        available = available.rename('units_available').reset_index()
+
+    for frame in (requested, available):
+        frame['blood_type'] = frame['blood_type'].astype(str)
+    comparison = pd.merge(requested, available, on='blood_type', how='outer').fillna(0)
+    comparison = comparison[comparison['blood_type'] != 'None']
+    return comparison.astype({'units_requested': 'float64', 'units_available': 'float64'}).sort_values('blood_type')
+
+
+def stock_trend(days=180, source=None):
+    # DataFrame indexed by snapshot_date with one column per blood type (active units),
+    # read from the daily summary rows rather than from units2
+    import pandas as pd
+    source = source or ANALYTICS_SOURCE
+    if source != 'mysql':
+        return None
+    connection = cursor = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT snapshot_date, blood_type, active, expiring_soon, used, delivered, expired
+            FROM inventory_snapshots
+            WHERE snapshot_date >= CURDATE() - INTERVAL %s DAY
+            ORDER BY snapshot_date
+        """, (days,))
+        rows = cursor.fetchall()
+    finally:
+        release(connection, cursor)
+
+    if not rows:
+        return None
+    snapshots = pd.DataFrame(rows, columns=['snapshot_date', 'blood_type', 'active', 'expiring_soon',
+                                            'used', 'delivered', 'expired'])
+    snapshots['snapshot_date'] = pd.to_datetime(snapshots['snapshot_date'])
+    return snapshots.pivot(index='snapshot_date', columns='blood_type', values='active').fillna(0)
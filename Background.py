@@ -0,0 +1,157 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+# Database calls, model prediction and image rendering run on these threads;
+# results are handed back to the Tk loop, which is the only thread touching widgets.
+BACKGROUND_WORKERS = 4
+POLL_INTERVAL_MS = 50
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class BackgroundTask:
+    def __init__(self, description, future, token, on_success, on_error, on_cancel=None):
+        self.description = description
+        self.future = future
+        self.token = token
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+
+    def cancel(self):
+        # Work that already started finishes in the background, but its result is dropped
+        self.token.cancel()
+        self.future.cancel()
+
+
+class BackgroundRunner:
+    def __init__(self, root, max_workers=BACKGROUND_WORKERS):
+        self.root = root
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blood-bank")
+        self.tasks = []
+        self.listeners = []
+        self._polling = False
+
+    def submit(self, description, fn, *args, on_success=None, on_error=None, on_cancel=None, pass_token=False,
+               **kwargs):
+        # on_cancel runs on the Tk loop when the task is cancelled, so callers that track
+        # their task (e.g. one page load at a time) can let go of it
+        token = CancelToken()
+        if pass_token:
+            kwargs['cancel_token'] = token
+        future = self.executor.submit(fn, *args, **kwargs)
+        task = BackgroundTask(description, future, token, on_success, on_error, on_cancel)
+        self.tasks.append(task)
+        self._notify()
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+        return task
+
+    def _poll(self):
+        finished = [task for task in self.tasks if task.future.done()]
+        for task in finished:
+            self.tasks.remove(task)
+        if finished:
+            self._notify()
+
+        for task in finished:
+            if task.token.cancelled or task.future.cancelled():
+                print(f"⚠ Cancelled: {task.description}")
+                self._cancelled(task)
+                continue
+            error = task.future.exception()
+            try:
+                if error is not None:
+                    if task.on_error:
+                        task.on_error(error)
+                    else:
+                        traceback.print_exception(type(error), error, error.__traceback__)
+                        messagebox.showerror("Error", f"{task.description} failed: {error}")
+                elif task.on_success:
+                    task.on_success(task.future.result())
+            except tk.TclError:
+                # The window that asked for this result was closed in the meantime
+                pass
+
+        if self.tasks:
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+        else:
+            self._polling = False
+
+    def cancel(self, task):
+        task.cancel()
+        if task in self.tasks:
+            self.tasks.remove(task)
+            self._notify()
+            self._cancelled(task)
+
+    def _cancelled(self, task):
+        if task.on_cancel:
+            try:
+                task.on_cancel()
+            except tk.TclError:
+                pass
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def _notify(self):
+        for callback in list(self.listeners):
+            callback(list(self.tasks))
+
+    def shutdown(self):
+        for task in list(self.tasks):
+            self.cancel(task)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TaskStatusBar(tk.Frame):
+    # Shows what is running in the background, with a Cancel button per task
+    def __init__(self, parent, runner, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.runner = runner
+        self.rows = tk.Frame(self, bg=self['bg'])
+        self.rows.pack(fill='x')
+        runner.add_listener(self.refresh)
+        self.bind("<Destroy>", lambda e: runner.remove_listener(self.refresh) if e.widget is self else None)
+        self.refresh(list(runner.tasks))
+
+    def refresh(self, tasks):
+        for widget in self.rows.winfo_children():
+            widget.destroy()
+        for task in tasks:
+            row = tk.Frame(self.rows, bg=self['bg'])
+            row.pack(fill='x', pady=1)
+            progress = ttk.Progressbar(row, mode='indeterminate', length=80)
+            progress.pack(side='left', padx=5)
+            progress.start(15)
+            tk.Label(row, text=f"⏳ {task.description}", bg=self['bg']).pack(side='left')
+            tk.Button(row, text="Cancel", command=lambda t=task: self.runner.cancel(t)).pack(side='right', padx=5)
+
+
+_runner = None
+
+
+def get_runner(root=None):
+    global _runner
+    if _runner is None:
+        _runner = BackgroundRunner(root or tk._default_root)
+    return _runner
@@ -2,47 +2,54 @@ import mysql.connector
 import qrcode
 from datetime import datetime
 import os
+import uuid
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
+from PIL import Image, ImageTk, ImageDraw, ImageFont
+from concurrent.futures import ProcessPoolExecutor
 import tkinter.ttk as ttk
-
-# Valid blood groups and their compatibility
-VALID_BLOOD_GROUPS = {'A+', 'A-', 'B+', 'B-', 'O+', 'O-', 'AB+', 'AB-'}
-BLOOD_COMPATIBILITY = {
-    'A+': ['A+', 'A-', 'O+', 'O-'],
-    'A-': ['A-', 'O-'],
-    'B+': ['B+', 'B-', 'O+', 'O-'],
-    'B-': ['B-', 'O-'],
-    'AB+': ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-'],
-    'AB-': ['A-', 'B-', 'AB-', 'O-'],
-    'O+': ['O+', 'O-'],
-    'O-': ['O-']
-}
-
-# Database configuration
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'root',
-    'database': 'blood'
-}
+from Database import get_connection, release
+from Migrations import run_migrations
+from Blood_Types import VALID_BLOOD_GROUPS
+from Allocation import allocate_requests, plan_allocation, candidate_limits
+from Inventory import get_ledger
+from Analytics_Data import mark_changed
+from Background import get_runner, TaskStatusBar
+from Table_View import TABLE_VIEWS, fetch_page, count_rows, invalidate_counts, sortable_columns
+from Storage import get_storage
+from Metrics import timed
+
+
+# Label sheet layout: A4 at 150 dpi
+SHEET_SIZE = (1240, 1754)
+SHEET_COLUMNS = 4
+SHEET_MARGIN = 40
+# Below this many labels a process pool costs more to start than it saves
+QR_POOL_THRESHOLD = 8
+
+def render_qr_label(job):
+    # Module-level so it can run in a worker process
+    data, donor_name, output_dir = job
+    # version=None with fit=True picks the smallest QR version that holds the payload
+    qr = qrcode.QRCode(version=None, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color='black', back_color='white')
+
+    filename = f"{donor_name.replace(' ', '_')}_qr.png"
+    filepath = os.path.join(output_dir, filename) if output_dir else filename
+    img.save(filepath)
+    return filepath
 
 class QRCodeGenerator:
     @staticmethod
+    @timed('qr_generate')
     def generate(data, donor_name, output_dir=""):
         try:
-            qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
-            qr.add_data(data)
-            qr.make(fit=True)
-            img = qr.make_image(fill='black', back_color='white')
-
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
 
-            filename = f"{donor_name.replace(' ', '_')}_qr.png"
-            filepath = os.path.join(output_dir, filename) if output_dir else filename
-            img.save(filepath)
+            filepath = render_qr_label((data, donor_name, output_dir))
             print(f"✅ QR Code generated and saved at: {filepath}")
 
             QRCodeGenerator.show_qr_popup(filepath)
@@ -51,6 +58,92 @@ class QRCodeGenerator:
             print(f"❌ Error generating QR code: {e}")
             return False
 
+    @staticmethod
+    @timed('qr_generate_batch')
+    def generate_batch(labels, output_dir="qr_codes", workers=None, sheet_format="pdf"):
+        # labels: [(data, donor_name), ...]. Headless: writes one PNG per label plus a
+        # printable sheet and returns (png_paths, sheet_path) without touching Tk.
+        if not labels:
+            return [], None
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        jobs = [(data, donor_name, output_dir) for data, donor_name in labels]
+        try:
+            if len(jobs) < QR_POOL_THRESHOLD:
+                paths = [render_qr_label(job) for job in jobs]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    paths = list(pool.map(render_qr_label, jobs, chunksize=max(1, len(jobs) // 32)))
+            sheet_path = QRCodeGenerator.build_label_sheet(paths, labels, output_dir, sheet_format)
+        except Exception as e:
+            print(f"❌ Error generating QR labels: {e}")
+            return [], None
+
+        print(f"✅ {len(paths)} QR labels generated, sheet saved at: {sheet_path}")
+        return paths, sheet_path
+
+    @staticmethod
+    def build_label_sheet(paths, labels, output_dir, sheet_format="pdf"):
+        cell = (SHEET_SIZE[0] - 2 * SHEET_MARGIN) // SHEET_COLUMNS
+        rows_per_page = (SHEET_SIZE[1] - 2 * SHEET_MARGIN) // (cell + 30)
+        per_page = SHEET_COLUMNS * rows_per_page
+        font = ImageFont.load_default()
+
+        pages = []
+        for start in range(0, len(paths), per_page):
+            page = Image.new("RGB", SHEET_SIZE, "white")
+            draw = ImageDraw.Draw(page)
+            for i, (path, (_, donor_name)) in enumerate(zip(paths[start:start + per_page], labels[start:start + per_page])):
+                x = SHEET_MARGIN + (i % SHEET_COLUMNS) * cell
+                y = SHEET_MARGIN + (i // SHEET_COLUMNS) * (cell + 30)
+                with Image.open(path) as img:
+                    page.paste(img.convert("RGB").resize((cell - 10, cell - 10), Image.NEAREST), (x + 5, y))
+                draw.text((x + 5, y + cell - 5), donor_name, fill="black", font=font)
+            pages.append(page)
+
+        # Batches finishing in the same second must not overwrite each other's sheet
+        stamp = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        if sheet_format == "pdf":
+            sheet_path = os.path.join(output_dir, f"labels_{stamp}.pdf")
+            pages[0].save(sheet_path, save_all=True, append_images=pages[1:], resolution=150)
+        else:
+            sheet_path = os.path.join(output_dir, f"labels_{stamp}.png")
+            pages[0].save(sheet_path)
+            for number, page in enumerate(pages[1:], start=2):
+                page.save(os.path.join(output_dir, f"labels_{stamp}_{number}.png"))
+        # Small preview of the first page for the summary window
+        preview = pages[0].copy()
+        preview.thumbnail((420, 600))
+        preview.save(os.path.splitext(sheet_path)[0] + "_preview.png")
+        return sheet_path
+
+    @staticmethod
+    def show_batch_summary(sheet_path, label_count):
+        try:
+            popup = tk.Toplevel()
+            popup.title("Generated QR Labels")
+
+            tk.Label(popup, text=f"{label_count} QR labels generated\nSheet: {sheet_path}").pack(padx=10, pady=10)
+            img = Image.open(os.path.splitext(sheet_path)[0] + "_preview.png")
+            photo = ImageTk.PhotoImage(img)
+
+            label = tk.Label(popup, image=photo)
+            label.image = photo
+            label.pack()
+
+            close_btn = ttk.Button(popup, text="Close", command=popup.destroy)
+            close_btn.pack(pady=10)
+
+            popup.update_idletasks()
+            width = popup.winfo_width()
+            height = popup.winfo_height()
+            x = (popup.winfo_screenwidth() // 2) - (width // 2)
+            y = (popup.winfo_screenheight() // 2) - (height // 2)
+            popup.geometry(f'+{x}+{y}')
+        except Exception as e:
+            print(f"❌ Error displaying QR label summary: {e}")
+
     @staticmethod
     def show_qr_popup(image_path):
         try:
@@ -78,156 +171,182 @@ class QRCodeGenerator:
 
 
 def setup_database():
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS units2 (
-                blood_id INT AUTO_INCREMENT PRIMARY KEY,
-                blood_type VARCHAR(5),
-                quantity_ml INT,
-                donor_id INT,
-                donation_date DATE,
-                expiration_date DATE,
-                status VARCHAR(20) DEFAULT 'active'
-            );
-        """)
-
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS blood_requests (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                blood_type VARCHAR(5),
-                request_date DATE,
-                location VARCHAR(100),
-                hospital_name VARCHAR(150),
-                contact_number VARCHAR(15),
-                status VARCHAR(20) DEFAULT 'pending',
-                units_requested INT
-            );
-        """)
-
-        connection.commit()
-        print("✅ Database setup complete")
-    except mysql.connector.Error as err:
-        print(f"❌ Database setup error: {err}")
-    finally:
-        if 'connection' in locals() and connection.is_connected():
-            cursor.close()
-            connection.close()
-
-def fulfill_request(cursor, connection, blood_type, units_needed, request_id):
-    today = datetime.today().date()
-    compatible_types = BLOOD_COMPATIBILITY[blood_type]
-    placeholders = ', '.join(['%s'] * len(compatible_types))
-    
-    query = f"""
-        SELECT blood_id, blood_type 
-        FROM units2 
-        WHERE blood_type IN ({placeholders})
-        AND status = 'active' 
-        AND expiration_date > %s
-        ORDER BY 
-            CASE blood_type
-                WHEN %s THEN 0
-                ELSE 1
-            END,
-            expiration_date ASC
-        LIMIT %s
-    """
-
-    params = compatible_types + [today.strftime('%Y-%m-%d'), blood_type, units_needed]
-    cursor.execute(query, params)
-    compatible_units = cursor.fetchall()
-
-    if compatible_units and len(compatible_units) >= units_needed:
-        for unit in compatible_units[:units_needed]:
-            blood_id, _ = unit
-            cursor.execute("UPDATE units2 SET status = 'used' WHERE blood_id = %s", (blood_id,))
-        cursor.execute("UPDATE blood_requests SET status = 'approved' WHERE id = %s", (request_id,))
-        connection.commit()
-        print(f"✅ Request {request_id} approved.")
-        return True
-    else:
-        print(f"⚠ Not enough compatible units for request {request_id}.")
-        return False
+    # Schema is owned by Migrations.py; this only applies whatever is still pending
+    return run_migrations()
 
+@timed('insert_and_process_requests')
 def insert_and_process_requests(location, hospital_name, contact_number, request_date, blood_types, units_requested):
+    connection = cursor = None
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
+        request_ids = get_storage().add_requests(location, hospital_name, contact_number, request_date,
+                                                 list(zip(blood_types, units_requested)))
+        mark_changed('blood_requests')
 
-        approved_requests = []
-
-        for blood_type, units_needed in zip(blood_types, units_requested):
-            cursor.execute("""
-                INSERT INTO blood_requests 
-                (location, hospital_name, contact_number, request_date, blood_type, units_requested)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (location, hospital_name, contact_number, request_date, blood_type, units_needed))
-            connection.commit()
+        connection = get_connection()
+        cursor = connection.cursor()
 
-            request_id = cursor.lastrowid
-            print(f"Processing request ID {request_id} for {blood_type}...")
-            if fulfill_request(cursor, connection, blood_type, units_needed, request_id):
-                approved_requests.append(request_id)
+        # Allocate the whole order together so early lines don't use up units later lines need
+        print(f"Processing request IDs {request_ids} for {blood_types}...")
+        plan = allocate_requests(cursor, connection, request_ids)
+        for request_id in plan.unfulfilled:
+            print(f"⚠ Not enough compatible units for request {request_id}.")
 
-        return approved_requests
+        return [request_id for request_id in request_ids if request_id in plan.allocations]
     except mysql.connector.Error as err:
         print(f"❌ Database error: {err}")
         return []
     finally:
-        if 'connection' in locals() and connection.is_connected():
-            cursor.close()
-            connection.close()
+        release(connection, cursor)
 
-def process_approved_requests():
+# Requests claimed per dispatch transaction
+DISPATCH_BATCH_SIZE = 500
+
+def dispatch_batch(cursor, connection, request_ids=None, after_id=0):
+    # Claim approved requests; SKIP LOCKED lets several workers split the work without overlap
+    if request_ids is None:
+        cursor.execute("""
+            SELECT id, location, hospital_name
+            FROM blood_requests
+            WHERE status = 'approved' AND id > %s
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (after_id, DISPATCH_BATCH_SIZE))
+    else:
+        placeholders = ', '.join(['%s'] * len(request_ids))
+        cursor.execute(f"""
+            SELECT id, location, hospital_name
+            FROM blood_requests
+            WHERE id IN ({placeholders}) AND status = 'approved'
+            ORDER BY id
+            FOR UPDATE SKIP LOCKED
+        """, list(request_ids))
+    requests = cursor.fetchall()
+    if not requests:
+        connection.rollback()
+        return [], [], []
+
+    # Exactly the units recorded for these requests at allocation time
+    placeholders = ', '.join(['%s'] * len(requests))
+    cursor.execute(f"""
+        SELECT a.request_id, u.blood_id, u.blood_type, u.expiration_date
+        FROM request_allocations a
+        JOIN units2 u ON u.blood_id = a.blood_id
+        WHERE a.request_id IN ({placeholders}) AND u.status = 'used'
+        ORDER BY a.request_id, u.expiration_date
+    """, [request[0] for request in requests])
+    units_by_request = {}
+    for request_id, blood_id, blood_type, expiration_date in cursor.fetchall():
+        units_by_request.setdefault(request_id, []).append((blood_id, blood_type, expiration_date))
+
+    completed = [request for request in requests if request[0] in units_by_request]
+    for request_id, _, _ in requests:
+        if request_id not in units_by_request:
+            print(f"⚠ Request {request_id} has no recorded units to deliver, leaving it approved.")
+    if not completed:
+        connection.rollback()
+        return requests, [], []
+
+    blood_ids = [unit[0] for request in completed for unit in units_by_request[request[0]]]
+    placeholders = ', '.join(['%s'] * len(blood_ids))
+    cursor.execute(f"UPDATE units2 SET status = 'delivered' WHERE blood_id IN ({placeholders})", blood_ids)
+    placeholders = ', '.join(['%s'] * len(completed))
+    cursor.execute(f"UPDATE blood_requests SET status = 'completed' WHERE id IN ({placeholders})",
+                   [request[0] for request in completed])
+    connection.commit()
+    mark_changed('units2', 'blood_requests')
+
+    labels = []
+    for request_id, location, hospital_name in completed:
+        for blood_id, blood_type, expiration_date in units_by_request[request_id]:
+            data = (
+                f"Blood Bank: LifeCare Blood Bank\n"
+                f"Blood Type: {blood_type}\n"
+                f"Expiration Date: {expiration_date}\n"
+                f"Hospital: {hospital_name}\n"
+                f"Location: {location}\n"
+                f"Blood ID: {blood_id}"
+            )
+            labels.append((data, f"{hospital_name}_{blood_id}"))
+    return requests, [request[0] for request in completed], labels
+
+@timed('dispatch_approved_requests')
+def dispatch_approved_requests(request_ids=None):
+    # With request_ids only those requests are dispatched; without, the approved backlog
+    # is walked in id order. Either way the cost follows the new work, not table size.
+    connection = cursor = None
+    completed_ids = []
+    all_labels = []
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        connection = get_connection()
         cursor = connection.cursor()
-        cursor.execute("SELECT * FROM blood_requests WHERE status = 'approved'")
-        approved_requests = cursor.fetchall()
-
-        if not approved_requests:
-            print("No approved requests to process.")
-            return
 
-        for request in approved_requests:
-            request_id, blood_type, request_date, location, hospital_name, contact_number, status, units_requested = request
-            print(f"Processing approved request {request_id} for {blood_type}...")
-
-            cursor.execute(""" 
-                SELECT blood_id, quantity_ml, expiration_date 
-                FROM units2 
-                WHERE blood_type = %s AND status = 'used' 
-                ORDER BY expiration_date ASC
-                LIMIT %s
-            """, (blood_type, units_requested))
-            blood_records = cursor.fetchall()
-
-            for blood_id, quantity_ml, expiration_date in blood_records:
-                data = (
-                    f"Blood Bank: LifeCare Blood Bank\n"
-                    f"Blood Type: {blood_type}\n"
-                    f"Expiration Date: {expiration_date}\n"
-                    f"Hospital: {hospital_name}\n"
-                    f"Location: {location}\n"
-                    f"Blood ID: {blood_id}"
-                )
-                donor_name = f"{hospital_name}_{blood_id}"
-                QRCodeGenerator.generate(data, donor_name, output_dir="qr_codes")
-                cursor.execute("UPDATE units2 SET status = 'delivered' WHERE blood_id = %s", (blood_id,))
-                connection.commit()
-
-            cursor.execute("UPDATE blood_requests SET status = 'completed' WHERE id = %s", (request_id,))
-            connection.commit()
-            print(f"✅ Request {request_id} completed and QR codes generated.")
+        if request_ids is not None:
+            request_ids = list(request_ids)
+            batches = [request_ids[i:i + DISPATCH_BATCH_SIZE] for i in range(0, len(request_ids), DISPATCH_BATCH_SIZE)]
+        after_id = 0
+        while True:
+            if request_ids is not None:
+                if not batches:
+                    break
+                claimed, completed, labels = dispatch_batch(cursor, connection, batches.pop(0))
+            else:
+                claimed, completed, labels = dispatch_batch(cursor, connection, after_id=after_id)
+                if not claimed:
+                    break
+                after_id = claimed[-1][0]
+
+            for request_id in completed:
+                print(f"✅ Request {request_id} completed.")
+            completed_ids.extend(completed)
+            all_labels.extend(labels)
     except mysql.connector.Error as err:
         print(f"❌ Database error: {err}")
     finally:
-        if 'connection' in locals() and connection.is_connected():
-            cursor.close()
-            connection.close()
+        release(connection, cursor)
+
+    if not completed_ids:
+        print("No approved requests to process.")
+    return completed_ids, all_labels
+
+@timed('process_approved_requests')
+def process_approved_requests(request_ids=None, show_summary=True):
+    completed_ids, labels = dispatch_approved_requests(request_ids)
+    if labels:
+        # Labels are rendered after commit so no row locks are held while drawing
+        _, sheet_path = QRCodeGenerator.generate_batch(labels, output_dir="qr_codes")
+        if sheet_path and show_summary:
+            QRCodeGenerator.show_batch_summary(sheet_path, len(labels))
+    return completed_ids
+
+def submit_and_dispatch(location, hospital_name, contact_number, request_date, blood_types, units_requested):
+    # Everything the Submit button does except the widgets, so it can run off the Tk thread
+    approved = insert_and_process_requests(location, hospital_name, contact_number, request_date,
+                                           blood_types, units_requested)
+    sheet_path, label_count = None, 0
+    if approved:
+        _, labels = dispatch_approved_requests(approved)
+        if labels:
+            _, sheet_path = QRCodeGenerator.generate_batch(labels, output_dir="qr_codes")
+            label_count = len(labels)
+    return approved, sheet_path, label_count
+
+def load_stock():
+    ledger = get_ledger()
+    if not ledger.ensure_loaded():
+        return None
+    return ledger.stock_by_type()
+
+def check_stock(blood_types, units_requested):
+    # Plans the whole order against the ledger the way Submit's allocate_requests does,
+    # so two lines never count the same bags; None per line that would go unfulfilled
+    ledger = get_ledger()
+    if not ledger.ensure_loaded():
+        return None
+    lines = [(line, blood_type, units_needed)
+             for line, (blood_type, units_needed) in enumerate(zip(blood_types, units_requested))]
+    plan = plan_allocation(lines, ledger.first_expiring(candidate_limits(lines)))
+    return [plan.allocations.get(line) for line in range(len(lines))]
 
 class DonationWindow(tk.Toplevel):
     def __init__(self, parent):
@@ -272,9 +391,9 @@ class BloodRequestApp(tk.Toplevel):  # Changed from tk.Tk to tk.Toplevel
         self.title("Blood Bank Request System")
         self.geometry("600x500")
         self.resizable(False, False)
+        self.runner = get_runner()
         
         self.create_widgets()
-        setup_database()
         
         # Center the window
         self.update_idletasks()
@@ -317,9 +436,17 @@ class BloodRequestApp(tk.Toplevel):  # Changed from tk.Tk to tk.Toplevel
         add_btn = tk.Button(self, text="Add Blood Type", command=self.add_blood_type_row)
         add_btn.pack(pady=5)
 
+        tk.Button(self, text="Check Availability", command=self.check_availability).pack(pady=5)
+
         self.submit_btn = tk.Button(self, text="Submit Request", command=self.submit_request)
         self.submit_btn.pack(pady=10)
 
+        self.stock_label = tk.Label(self, text="", font=("Arial", 9))
+        self.stock_label.pack(pady=5)
+
+        TaskStatusBar(self, self.runner).pack(side='bottom', fill='x')
+        self.update_stock_label()
+
     def add_blood_type_row(self):
         row = len(self.blood_entries)
         blood_type_var = tk.StringVar()
@@ -335,6 +462,51 @@ class BloodRequestApp(tk.Toplevel):  # Changed from tk.Tk to tk.Toplevel
 
         self.blood_entries.append((blood_type_var, unit_var))
 
+    def get_blood_lines(self):
+        blood_types, units_requested = [], []
+        for blood_type_var, unit_var in self.blood_entries:
+            b_type = blood_type_var.get().upper()
+            try:
+                unit_val = int(unit_var.get())
+            except:
+                continue
+            if b_type in VALID_BLOOD_GROUPS and unit_val > 0:
+                blood_types.append(b_type)
+                units_requested.append(unit_val)
+        return blood_types, units_requested
+
+    def update_stock_label(self):
+        self.stock_label.config(text="Loading live stock...")
+        self.runner.submit("Loading live stock", load_stock, on_success=self.show_stock)
+
+    def show_stock(self, stock):
+        if stock is None:
+            self.stock_label.config(text="Live stock unavailable")
+            return
+        self.stock_label.config(text="Live stock: " + "  ".join(f"{t} {n}" for t, n in stock.items()))
+
+    def check_availability(self):
+        blood_types, units_requested = self.get_blood_lines()
+        if not blood_types:
+            messagebox.showerror("Input Error", "Add at least one valid blood type and unit.")
+            return
+        self.runner.submit("Checking availability", check_stock, blood_types, units_requested,
+                           on_success=lambda found: self.show_availability(blood_types, units_requested, found))
+
+    def show_availability(self, blood_types, units_requested, found):
+        if found is None:
+            messagebox.showerror("Database Error", "Could not load the current inventory.")
+            return
+
+        lines = []
+        for blood_type, units_needed, units in zip(blood_types, units_requested, found):
+            if units is None:
+                lines.append(f"{blood_type} x{units_needed}: not enough compatible units")
+            else:
+                lines.append(f"{blood_type} x{units_needed}: available (units {', '.join(map(str, units))})")
+        self.update_stock_label()
+        messagebox.showinfo("Availability", "\n".join(lines))
+
     def submit_request(self):
         hospital = self.hospital_entry.get()
         location = self.location_entry.get()
@@ -353,37 +525,47 @@ class BloodRequestApp(tk.Toplevel):  # Changed from tk.Tk to tk.Toplevel
             messagebox.showerror("Date Error", "Invalid date format. Use YYYY-MM-DD.")
             return
 
-        blood_types, units_requested = [], []
-        for blood_type_var, unit_var in self.blood_entries:
-            b_type = blood_type_var.get().upper()
-            try:
-                unit_val = int(unit_var.get())
-            except:
-                continue
-            if b_type in VALID_BLOOD_GROUPS and unit_val > 0:
-                blood_types.append(b_type)
-                units_requested.append(unit_val)
-
+        blood_types, units_requested = self.get_blood_lines()
         if not blood_types:
             messagebox.showerror("Input Error", "Add at least one valid blood type and unit.")
             return
 
-        approved = insert_and_process_requests(location, hospital, contact, request_date, blood_types, units_requested)
+        self.submit_btn.config(state='disabled')
+        self.runner.submit("Submitting request", submit_and_dispatch,
+                           location, hospital, contact, request_date, blood_types, units_requested,
+                           on_success=self.on_request_processed, on_error=self.on_request_failed)
+
+    def on_request_processed(self, result):
+        approved, sheet_path, label_count = result
+        self.submit_btn.config(state='normal')
+        self.update_stock_label()
 
         if approved:
-            process_approved_requests()
+            if sheet_path:
+                QRCodeGenerator.show_batch_summary(sheet_path, label_count)
             messagebox.showinfo("Success", f"Request submitted and QR codes generated.")
         else:
             messagebox.showwarning("Incomplete", "Request submitted, but not fully approved.")
+
+    def on_request_failed(self, error):
+        self.submit_btn.config(state='normal')
+        messagebox.showerror("Error", f"Request could not be processed: {error}")
+
 class DatabaseViewer(tk.Toplevel):
+    # Rows are fetched a page at a time as the user scrolls, so only what is looked at is loaded
     def __init__(self, parent):
         super().__init__(parent)
         self.title("Database Viewer")
         self.geometry("1000x600")
-        
-        # Configure DB connection
-        self.conn = mysql.connector.connect(**DB_CONFIG)
-        self.cursor = self.conn.cursor()
+        self.runner = get_runner()
+        self.page_task = None
+        self.count_task = None
+        self.sort_column = None
+        self.descending = False
+        self.next_after = None
+        self.filters = {}
+        self.loaded_rows = 0
+        self.total_rows = 0
         
         self.create_widgets()
         self.load_data()
@@ -401,57 +583,162 @@ class DatabaseViewer(tk.Toplevel):
     def create_widgets(self):
         # Table selector
         self.table_var = tk.StringVar()
-        tables = ["donor_registration", "blood_requests", "units2"]
         tk.Label(self, text="Select Table:").pack(pady=5)
-        table_menu = ttk.Combobox(self, textvariable=self.table_var, values=tables)
+        table_menu = ttk.Combobox(self, textvariable=self.table_var, values=list(TABLE_VIEWS), state='readonly')
         table_menu.pack()
-        table_menu.bind("<<ComboboxSelected>>", lambda e: self.load_data())
-        
+        table_menu.bind("<<ComboboxSelected>>", lambda e: self.on_table_selected())
+
+        # Filters, applied in SQL
+        filter_frame = tk.Frame(self)
+        filter_frame.pack(pady=5)
+        self.blood_type_var = tk.StringVar()
+        self.status_var = tk.StringVar()
+        self.date_from_var = tk.StringVar()
+        self.date_to_var = tk.StringVar()
+
+        tk.Label(filter_frame, text="Blood Type:").grid(row=0, column=0, padx=3)
+        ttk.Combobox(filter_frame, textvariable=self.blood_type_var, values=[""] + sorted(VALID_BLOOD_GROUPS),
+                     width=5, state='readonly').grid(row=0, column=1, padx=3)
+        tk.Label(filter_frame, text="Status:").grid(row=0, column=2, padx=3)
+        self.status_menu = ttk.Combobox(filter_frame, textvariable=self.status_var, width=10, state='readonly')
+        self.status_menu.grid(row=0, column=3, padx=3)
+        self.date_label = tk.Label(filter_frame, text="Date from/to (YYYY-MM-DD):")
+        self.date_label.grid(row=0, column=4, padx=3)
+        tk.Entry(filter_frame, textvariable=self.date_from_var, width=11).grid(row=0, column=5, padx=3)
+        tk.Entry(filter_frame, textvariable=self.date_to_var, width=11).grid(row=0, column=6, padx=3)
+        tk.Button(filter_frame, text="Apply", command=self.apply_filters).grid(row=0, column=7, padx=3)
+        tk.Button(filter_frame, text="Clear", command=self.clear_filters).grid(row=0, column=8, padx=3)
+
+        TaskStatusBar(self, self.runner).pack(side='bottom', fill='x')
+        bottom = tk.Frame(self)
+        bottom.pack(side='bottom', fill='x')
+        self.count_label = tk.Label(bottom, text="")
+        self.count_label.pack(side='left', padx=10)
+        # Refresh button
+        tk.Button(bottom, text="Refresh", command=self.refresh, bg="#4ecdc4").pack(side='right', padx=10, pady=5)
+
         # Treeview for data display
-        self.tree = ttk.Treeview(self)
-        self.tree.pack(expand=True, fill='both', padx=10, pady=10)
+        table_frame = tk.Frame(self)
+        table_frame.pack(expand=True, fill='both', padx=10, pady=10)
+        self.tree = ttk.Treeview(table_frame, show="headings")
         
         # Scrollbar
-        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
-        scrollbar.pack(side='right', fill='y')
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        # Refresh button
-        tk.Button(self, text="Refresh", command=self.load_data, bg="#4ecdc4").pack(pady=5)
+        self.scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', expand=True, fill='both')
+        self.tree.configure(yscrollcommand=self.on_scroll)
+
+    def on_table_selected(self):
+        spec = TABLE_VIEWS[self.table_var.get()]
+        self.status_var.set("")
+        self.status_menu.config(values=[""] + spec['statuses'],
+                                state='readonly' if spec['statuses'] else 'disabled')
+        self.date_label.config(text=f"{spec['date_column']} from/to:")
+        self.sort_column = None
+        self.descending = False
+        self.load_data()
+
+    def apply_filters(self):
+        filters = {
+            'blood_type': self.blood_type_var.get(),
+            'status': self.status_var.get(),
+            'date_from': self.date_from_var.get().strip(),
+            'date_to': self.date_to_var.get().strip(),
+        }
+        for name in ('date_from', 'date_to'):
+            if filters[name]:
+                try:
+                    datetime.strptime(filters[name], '%Y-%m-%d')
+                except ValueError:
+                    messagebox.showerror("Date Error", "Invalid date format. Use YYYY-MM-DD.")
+                    return
+        self.filters = filters
+        self.load_data()
+
+    def clear_filters(self):
+        for var in (self.blood_type_var, self.status_var, self.date_from_var, self.date_to_var):
+            var.set("")
+        self.filters = {}
+        self.load_data()
+
+    def refresh(self):
+        invalidate_counts(self.table_var.get() or None)
+        self.load_data()
+
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.descending = not self.descending
+        else:
+            self.sort_column, self.descending = column, False
+        self.load_data()
     
     def load_data(self):
+        # Start over from the first page with the current table, filters and sort
         table = self.table_var.get()
         if not table:
             return
-            
-        try:
-            # Clear existing data
-            self.tree.delete(*self.tree.get_children())
-            
-            # Get column names
-            self.cursor.execute(f"SHOW COLUMNS FROM {table}")
-            columns = [column[0] for column in self.cursor.fetchall()]
+        for task in (self.page_task, self.count_task):
+            if task is not None:
+                self.runner.cancel(task)
+        self.tree.delete(*self.tree.get_children())
+        self.loaded_rows = 0
+        self.next_after = None
+        self.count_label.config(text="Counting rows...")
+        self.request_page(after=None)
+        self.count_task = self.runner.submit(f"Counting {table}", count_rows, table, dict(self.filters),
+                                             on_success=self.show_count)
+
+    def request_page(self, after):
+        table = self.table_var.get()
+        self.page_task = self.runner.submit(
+            f"Loading {table}", fetch_page, table, dict(self.filters), self.sort_column, self.descending, after,
+            on_success=lambda result: self.show_page(result, first=after is None),
+            on_error=self.on_load_error, on_cancel=self.on_page_cancelled)
+
+    def on_page_cancelled(self):
+        # Cancelled from the status bar: let the next scroll ask for the page again
+        self.page_task = None
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Fetch the next page once the user is near the bottom of what is loaded
+        if float(last) > 0.9 and self.next_after is not None and self.page_task is None:
+            self.request_page(self.next_after)
+
+    def show_page(self, result, first):
+        self.page_task = None
+        columns, rows, self.next_after = result
+        if first:
             self.tree["columns"] = columns
-            self.tree["show"] = "headings"
-            
-            # Set up columns
+            table = self.table_var.get()
+            sortable = sortable_columns(table)
             for col in columns:
-                self.tree.heading(col, text=col)
+                arrow = ""
+                if col == (self.sort_column or TABLE_VIEWS[table]['key']):
+                    arrow = " ▼" if self.descending else " ▲"
+                # Only indexed columns can be sorted; the other headers do nothing when clicked
+                command = (lambda c=col: self.sort_by(c)) if col in sortable else ""
+                self.tree.heading(col, text=col + arrow, command=command)
                 self.tree.column(col, width=100, anchor='center')
-            
-            # Fetch data
-            self.cursor.execute(f"SELECT * FROM {table} LIMIT 100")
-            for row in self.cursor.fetchall():
-                self.tree.insert("", "end", values=row)
-                
-        except mysql.connector.Error as err:
-            messagebox.showerror("Database Error", str(err))
-    
-    def __del__(self):
-        if hasattr(self, 'conn') and self.conn.is_connected():
-            self.cursor.close()
-            self.conn.close()
+        for row in rows:
+            self.tree.insert("", "end", values=row)
+        self.loaded_rows += len(rows)
+        self.update_count_label()
+
+    def show_count(self, total):
+        self.count_task = None
+        self.total_rows = total
+        self.update_count_label()
+
+    def update_count_label(self):
+        if self.count_task is None:
+            self.count_label.config(text=f"Showing {self.loaded_rows} of {self.total_rows} rows")
+
+    def on_load_error(self, err):
+        self.page_task = None
+        messagebox.showerror("Database Error", str(err))
             
 if __name__ == "__main__":
+    setup_database()
     app = BloodRequestApp()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,167 @@
+import os
+import time
+import hashlib
+import argparse
+import pandas as pd
+import mysql.connector
+from Blood_Types import VALID_BLOOD_GROUPS
+from Database import get_connection, release
+from Migrations import run_migrations
+from Analytics_Data import mark_changed
+
+# CSV layout -> target table. Source ids are dropped so imported rows get fresh keys.
+IMPORT_KINDS = {
+    'donors': {
+        'table': 'donor_registration',
+        'columns': ['name', 'age', 'gender', 'hemoglobin_count', 'blood_type', 'last_donation_date', 'location',
+                    'contact_number', 'weight', 'pulse_rate', 'blood_pressure', 'chronic_disorders', 'elgibility'],
+        'required': ['name', 'age', 'gender', 'blood_type', 'last_donation_date'],
+        'dates': ['last_donation_date'],
+    },
+    'units': {
+        'table': 'units2',
+        'columns': ['donor_id', 'blood_type', 'quantity_ml', 'donation_date', 'expiration_date', 'status'],
+        'required': ['blood_type', 'quantity_ml', 'donation_date', 'expiration_date'],
+        'dates': ['donation_date', 'expiration_date'],
+        'defaults': {'status': 'active'},
+    },
+    'requests': {
+        'table': 'blood_requests',
+        'columns': ['blood_type', 'request_date', 'location', 'hospital_name', 'contact_number', 'status',
+                    'units_requested'],
+        'required': ['blood_type', 'request_date', 'units_requested'],
+        'dates': ['request_date'],
+        'defaults': {'status': 'pending'},
+    },
+}
+# Dates in the shipped CSVs are dd-mm-yyyy
+CSV_DATE_FORMAT = '%d-%m-%Y'
+
+
+def source_key(kind, filepath):
+    # Checkpoints follow the file contents, so an edited file starts over instead of resuming mid-way
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return f"{kind}:{digest.hexdigest()}"
+
+
+def clean_chunk(chunk, spec):
+    df = chunk.copy()
+    for column, value in spec.get('defaults', {}).items():
+        if column not in df.columns:
+            df[column] = value
+        df[column] = df[column].fillna(value)
+
+    reasons = pd.Series('', index=df.index)
+    missing = [col for col in spec['columns'] if col not in df.columns]
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+
+    for column in spec['required']:
+        reasons = reasons.mask(df[column].isna() & (reasons == ''), f"missing {column}")
+
+    df['blood_type'] = df['blood_type'].astype(str).str.strip().str.upper()
+    reasons = reasons.mask(~df['blood_type'].isin(VALID_BLOOD_GROUPS) & (reasons == ''), "invalid blood_type")
+
+    for column in spec['dates']:
+        parsed = pd.to_datetime(df[column], format=CSV_DATE_FORMAT, errors='coerce')
+        reasons = reasons.mask(parsed.isna() & df[column].notna() & (reasons == ''), f"invalid {column}")
+        df[column] = parsed.dt.date
+
+    if 'status' in df.columns:
+        df['status'] = df['status'].astype(str).str.strip().str.lower()
+    if 'elgibility' in df.columns:
+        # The app stores the model's verdict as text
+        df['elgibility'] = df['elgibility'].map({1: 'Eligible', 0: 'Not Eligible'}).fillna(df['elgibility'])
+
+    valid = reasons == ''
+    rows = df.loc[valid, spec['columns']].astype(object)
+    rows = rows.where(rows.notna(), None)
+    rejected = chunk.loc[~valid].assign(reject_reason=reasons[~valid])
+    return list(rows.itertuples(index=False, name=None)), rejected
+
+
+def import_csv(kind, filepath, chunksize=10000, restart=False):
+    spec = IMPORT_KINDS[kind]
+    key = source_key(kind, filepath)
+    rejected_path = f"{os.path.splitext(filepath)[0]}.rejected.csv"
+    placeholders = ', '.join(['%s'] * len(spec['columns']))
+    insert_query = f"INSERT INTO {spec['table']} ({', '.join(spec['columns'])}) VALUES ({placeholders})"
+
+    connection = cursor = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+
+        if restart:
+            cursor.execute("DELETE FROM import_checkpoints WHERE source = %s", (key,))
+            connection.commit()
+        cursor.execute("SELECT rows_done, rows_loaded, rows_rejected FROM import_checkpoints WHERE source = %s", (key,))
+        checkpoint = cursor.fetchone()
+        rows_done, rows_loaded, rows_rejected = checkpoint if checkpoint else (0, 0, 0)
+        if rows_done:
+            print(f"↻ Resuming {filepath} after {rows_done} rows")
+
+        start = time.perf_counter()
+        session_rows = 0
+        reader = pd.read_csv(filepath, chunksize=chunksize, skipinitialspace=True,
+                             skiprows=range(1, rows_done + 1) if rows_done else None)
+        for chunk in reader:
+            rows, rejected = clean_chunk(chunk, spec)
+            if rows:
+                cursor.executemany(insert_query, rows)
+
+            rows_done += len(chunk)
+            rows_loaded += len(rows)
+            rows_rejected += len(rejected)
+            # The checkpoint commits together with the chunk, so a crash never loads a row twice
+            cursor.execute("""
+                INSERT INTO import_checkpoints (source, kind, filename, rows_done, rows_loaded, rows_rejected)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE rows_done = VALUES(rows_done), rows_loaded = VALUES(rows_loaded),
+                    rows_rejected = VALUES(rows_rejected)
+            """, (key, kind, os.path.basename(filepath), rows_done, rows_loaded, rows_rejected))
+            connection.commit()
+            mark_changed(spec['table'])
+
+            if len(rejected):
+                rejected.to_csv(rejected_path, mode='a', header=not os.path.exists(rejected_path), index=False)
+
+            session_rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"... {rows_done} rows processed ({session_rows / elapsed:.0f} rows/s)")
+
+        elapsed = time.perf_counter() - start
+        rate = session_rows / elapsed if elapsed > 0 else 0.0
+        print(f"✅ Imported {filepath} into {spec['table']}: {rows_loaded} loaded, {rows_rejected} rejected "
+              f"({rate:.0f} rows/s)")
+        if rows_rejected:
+            print(f"⚠ Rejected rows written to: {rejected_path}")
+        return rows_loaded, rows_rejected
+    except mysql.connector.Error as err:
+        if connection is not None:
+            connection.rollback()
+        print(f"❌ Import failed, rerun to resume from the last committed chunk: {err}")
+        return None
+    finally:
+        release(connection, cursor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import donor, unit or request CSVs into MySQL")
+    parser.add_argument('kind', choices=sorted(IMPORT_KINDS))
+    parser.add_argument('csv', nargs='+')
+    parser.add_argument('--chunksize', type=int, default=10000)
+    parser.add_argument('--restart', action='store_true', help="ignore saved progress and import from the top")
+    args = parser.parse_args(argv)
+
+    if not run_migrations():
+        return
+    for filepath in args.csv:
+        import_csv(args.kind, filepath, args.chunksize, args.restart)
+
+
+if __name__ == "__main__":
+    main()
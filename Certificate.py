@@ -0,0 +1,163 @@
+import os
+import csv
+import time
+import argparse
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import tkinter as tk
+from tkinter import ttk
+from PIL import Image, ImageDraw, ImageFont, ImageTk
+from Metrics import timed
+
+CERTIFICATE_TEMPLATE = os.environ.get('BLOOD_BANK_CERT_TEMPLATE', r"D:\PSDL_ASSIGNMENT\BLOOD_BANK\BLOOD_BANK\certificate.jpg")
+CERTIFICATE_FONT = os.environ.get('BLOOD_BANK_CERT_FONT', r"D:\PSDL_ASSIGNMENT\BLOOD_BANK\BLOOD_BANK\great-vibes\GreatVibes-Regular.ttf")
+# JPEG quality used when saving (cv2.imwrite's default was 95)
+CERTIFICATE_QUALITY = 95
+# Popups show a scaled-down copy; the saved file stays full size
+PREVIEW_SIZE = (900, 650)
+
+
+@lru_cache(maxsize=4)
+def load_template(template_path):
+    # Decoded once per process; every certificate draws on a copy
+    with Image.open(template_path) as image:
+        return image.convert("RGB")
+
+
+@lru_cache(maxsize=8)
+def load_font(font_path, size):
+    return ImageFont.truetype(font_path, size)
+
+
+def warm_cache(template_path=CERTIFICATE_TEMPLATE, font_path=CERTIFICATE_FONT):
+    load_template(template_path)
+    load_font(font_path, 70)
+    load_font(font_path, 40)
+
+
+def render_certificate_job(job):
+    # Module-level so it can run in a worker process
+    donor_name, blood_type, donation_date, quantity_ml, output_dir, fmt, quality = job
+    image = CertificateGenerator.render(donor_name, blood_type, donation_date, quantity_ml)
+    return CertificateGenerator.save(image, donor_name, donation_date, output_dir, fmt, quality)
+
+
+class CertificateGenerator:
+    @staticmethod
+    def render(donor_name, blood_type, donation_date, quantity_ml,
+               template_path=CERTIFICATE_TEMPLATE, font_path=CERTIFICATE_FONT):
+        pil_image = load_template(template_path).copy()
+        draw = ImageDraw.Draw(pil_image)
+        name_font = load_font(font_path, 70)
+        details_font = load_font(font_path, 40)
+
+        name_text = donor_name
+        name_bbox = draw.textbbox((0, 0), name_text, font=name_font)
+        name_x = (pil_image.width - (name_bbox[2] - name_bbox[0])) / 2
+        name_y = pil_image.height - 600
+        draw.text((name_x, name_y), name_text, font=name_font, fill=(0, 0, 0))
+
+        details_text = f"for donating {quantity_ml}ml of {blood_type} blood on {donation_date}"
+        details_bbox = draw.textbbox((0, 0), details_text, font=details_font)
+        details_x = (pil_image.width - (details_bbox[2] - details_bbox[0])) / 2
+        details_y = name_y + 100
+        draw.text((details_x, details_y), details_text, font=details_font, fill=(0, 0, 0))
+        return pil_image
+
+    @staticmethod
+    def save(pil_image, donor_name, donation_date, output_dir="certificates", fmt="jpg", quality=CERTIFICATE_QUALITY):
+        filename = f"{output_dir}/{donor_name.replace(' ', '_')}_{donation_date}.{fmt}"
+        if fmt == "pdf":
+            pil_image.save(filename, "PDF", resolution=150, quality=quality)
+        else:
+            pil_image.save(filename, "JPEG", quality=quality, optimize=True)
+        return filename
+
+    @staticmethod
+    @timed('certificate_generate')
+    def generate(donor_name, blood_type, donation_date, quantity_ml, output_dir="certificates",
+                 fmt="jpg", quality=CERTIFICATE_QUALITY, show=True):
+        os.makedirs(output_dir, exist_ok=True)
+
+        try:
+            warm_cache()
+        except Exception as e:
+            print(f"❌ Error loading certificate template or fonts: {e}")
+            return False
+
+        pil_image = CertificateGenerator.render(donor_name, blood_type, donation_date, quantity_ml)
+        filename = CertificateGenerator.save(pil_image, donor_name, donation_date, output_dir, fmt, quality)
+
+        print(f"✅ Certificate generated successfully: {filename}")
+        if show:
+            preview = pil_image.copy()
+            preview.thumbnail(PREVIEW_SIZE)
+            CertificateGenerator.show_certificate_popup(preview)
+        return filename
+
+    @staticmethod
+    @timed('certificate_generate_batch')
+    def generate_batch(donations, output_dir="certificates", workers=None, fmt="jpg", quality=CERTIFICATE_QUALITY):
+        # donations: [(donor_name, blood_type, donation_date, quantity_ml), ...]
+        os.makedirs(output_dir, exist_ok=True)
+
+        jobs = [(*donation, output_dir, fmt, quality) for donation in donations]
+        start = time.perf_counter()
+        try:
+            # Each worker decodes the template and fonts once, then reuses them for its share
+            with ProcessPoolExecutor(max_workers=workers, initializer=warm_cache) as pool:
+                filenames = list(pool.map(render_certificate_job, jobs, chunksize=max(1, len(jobs) // 64)))
+        except Exception as e:
+            print(f"❌ Error generating certificates: {e}")
+            return []
+
+        elapsed = time.perf_counter() - start
+        rate = len(filenames) / elapsed if elapsed > 0 else 0.0
+        print(f"✅ {len(filenames)} certificates generated in {elapsed:.2f}s ({rate:.1f}/s) -> {output_dir}")
+        return filenames
+
+    @staticmethod
+    def show_certificate_popup(image):
+        popup = tk.Toplevel()
+        popup.title("Donation Certificate")
+
+        if isinstance(image, str):
+            img = Image.open(image)
+            img.thumbnail(PREVIEW_SIZE)
+        else:
+            img = image
+        photo = ImageTk.PhotoImage(img)
+
+        label = tk.Label(popup, image=photo)
+        label.image = photo
+        label.pack()
+
+        close_btn = ttk.Button(popup, text="Close", command=popup.destroy)
+        close_btn.pack(pady=10)
+
+        # Center window
+        popup.update_idletasks()
+        width = popup.winfo_width()
+        height = popup.winfo_height()
+        x = (popup.winfo_screenwidth() // 2) - (width // 2)
+        y = (popup.winfo_screenheight() // 2) - (height // 2)
+        popup.geometry(f'+{x}+{y}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render certificates for a whole blood drive")
+    parser.add_argument('csv', help="CSV with name, blood_type, donation_date, quantity_ml columns")
+    parser.add_argument('--output-dir', default="certificates")
+    parser.add_argument('--format', choices=['jpg', 'pdf'], default='jpg')
+    parser.add_argument('--quality', type=int, default=CERTIFICATE_QUALITY)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with open(args.csv, newline='') as f:
+        donations = [(row['name'], row['blood_type'], row['donation_date'], row['quantity_ml'])
+                     for row in csv.DictReader(f)]
+    CertificateGenerator.generate_batch(donations, args.output_dir, args.workers, args.format, args.quality)
+
+
+if __name__ == "__main__":
+    main()
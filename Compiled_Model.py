@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import argparse
+import datetime
+import warnings
+import numpy as np
+
+# Single-donor screening without pandas or scikit-learn in the call path. A trained
+# RandomForestClassifier is flattened into a few NumPy arrays, saved beside the joblib
+# artifact (.npz) so a kiosk or web front end can load it with NumPy alone. One donor is
+# scored by generated Python code (one nested if/else per tree, summing leaf probabilities
+# in tree order as scikit-learn does); batches walk all trees together over the arrays.
+GENDER_CODES = {'Male': 1, 'Female': 0, 'male': 1, 'female': 0, 'M': 1, 'F': 0}
+# Probe rows used to check a compiled forest against scikit-learn before it is trusted
+VERIFY_ROWS = 2000
+# Past these the generated source gets too large (or too deeply indented) to compile;
+# such forests score single donors over the arrays instead
+CODEGEN_MAX_NODES = 300000
+CODEGEN_MAX_DEPTH = 80
+
+
+def compiled_path(model_path):
+    root, _ = os.path.splitext(model_path)
+    return root + '.npz'
+
+
+class CompiledForest:
+    def __init__(self, feature, threshold, children, leaf_proba, roots, depth, classes, columns):
+        self.feature = feature          # per node: column compared (0 at leaves)
+        self.threshold = threshold      # per node: go left when x <= threshold
+        self.children = children        # per node: [left, right] interleaved; leaves point at themselves
+        self.leaf_proba = leaf_proba    # per node: class probabilities of that tree's leaf
+        self.roots = roots              # per tree: index of its root node
+        self.depth = int(depth)         # deepest leaf; that many steps reach every leaf
+        self.classes = classes
+        self.columns = list(columns)
+        self._eligible_index = list(classes).index(1) if 1 in list(classes) else len(classes) - 1
+        self._walk = self._generate()
+
+    @classmethod
+    def from_sklearn(cls, model, columns):
+        features, thresholds, children, probas, roots = [], [], [], [], []
+        offset = 0
+        depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            count = tree.node_count
+            nodes = np.arange(count)
+            leaf = tree.children_left == -1
+
+            left = np.where(leaf, nodes, tree.children_left) + offset
+            right = np.where(leaf, nodes, tree.children_right) + offset
+            pair = np.empty(2 * count, dtype=np.int64)
+            pair[0::2] = left
+            pair[1::2] = right
+
+            value = tree.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+
+            roots.append(offset)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            children.append(pair)
+            probas.append(value / totals)
+            depth = max(depth, tree.max_depth)
+            offset += count
+
+        return cls(np.concatenate(features).astype(np.intp), np.concatenate(thresholds),
+                   np.concatenate(children), np.concatenate(probas), np.array(roots, dtype=np.intp),
+                   depth, np.asarray(model.classes_), columns)
+
+    def predict_proba(self, X):
+        # X: (rows x features) in self.columns order
+        X = np.asarray(X, dtype=np.float32)   # scikit-learn compares float32 inputs too
+        if X.ndim == 1:
+            X = X[None, :]
+        if np.isnan(X).any():
+            raise ValueError("missing health fields")
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.depth):
+            go_right = X[rows, self.feature[node]] > self.threshold[node]
+            node = self.children[2 * node + go_right]
+        return self.leaf_proba[node].sum(axis=1) / len(self.roots)
+
+    def _generate(self):
+        if len(self.feature) > CODEGEN_MAX_NODES or self.depth > CODEGEN_MAX_DEPTH:
+            return None
+        n_classes = self.leaf_proba.shape[1]
+        args = ', '.join(f"x{i}" for i in range(len(self.columns)))
+        totals = ', '.join(f"p{k}" for k in range(n_classes))
+        lines = [f"def walk({args}):", f"    {' = '.join(f'p{k}' for k in range(n_classes))} = 0.0"]
+
+        def emit(node, indent):
+            pad = ' ' * indent
+            left, right = self.children[2 * node], self.children[2 * node + 1]
+            if left == node:
+                adds = [f"p{k} += {value!r}" for k, value in enumerate(self.leaf_proba[node].tolist()) if value]
+                lines.append(pad + ('; '.join(adds) or 'pass'))
+                return
+            lines.append(f"{pad}if x{self.feature[node]} <= {float(self.threshold[node])!r}:")
+            emit(left, indent + 4)
+            lines.append(pad + "else:")
+            emit(right, indent + 4)
+
+        for root in self.roots.tolist():
+            emit(root, 4)
+        lines.append(f"    return ({totals},)")
+        namespace = {}
+        try:
+            exec(compile('\n'.join(lines), '<compiled forest>', 'exec'), namespace)
+        except (SyntaxError, RecursionError, MemoryError):
+            return None
+        return namespace['walk']
+
+    def predict_one(self, x):
+        # Class probabilities for one donor; x in self.columns order
+        x = np.asarray(x, dtype=np.float32)
+        if self._walk is None:
+            return self.predict_proba(x)[0]
+        if np.isnan(x).any():
+            raise ValueError("missing health fields")
+        n_trees = len(self.roots)
+        return np.array([total / n_trees for total in self._walk(*x.tolist())])
+
+    def feature_vector(self, fields):
+        # A dict of the health fields (gender as 0/1 or Male/Female, and either
+        # days_since_last_donation or last_donation_date), or values in column order
+        if not isinstance(fields, dict):
+            return np.asarray(fields, dtype=np.float64)
+        values = []
+        for column in self.columns:
+            if column == 'gender':
+                value = GENDER_CODES.get(fields['gender'], fields['gender'])
+            elif column == 'days_since_last_donation' and column not in fields:
+                value = (datetime.date.today() - parse_date(fields['last_donation_date'])).days
+            else:
+                value = fields[column]
+            values.append(float(value))
+        return np.array(values)
+
+    def screen(self, fields):
+        # (eligibility, probability of being eligible) for one donor
+        proba = self.predict_one(self.feature_vector(fields))
+        eligible = self.classes[int(np.argmax(proba))] == 1
+        return ("Eligible" if eligible else "Not Eligible"), float(proba[self._eligible_index])
+
+    def verify(self, model, rows=VERIFY_ROWS, seed=0):
+        # Compare with scikit-learn on probe rows drawn around the split thresholds, including
+        # the thresholds themselves, where a float32/float64 slip would show up first.
+        # Returns the number of rows whose probabilities or class differ.
+        rng = np.random.default_rng(seed)
+        X = np.empty((rows, len(self.columns)))
+        for column in range(len(self.columns)):
+            cuts = self.threshold[(self.feature == column) & np.isfinite(self.threshold)]
+            if len(cuts) == 0:
+                X[:, column] = rng.normal(size=rows)
+                continue
+            low, high = cuts.min(), cuts.max()
+            spread = max(high - low, 1.0)
+            X[:, column] = rng.uniform(low - spread * 0.1, high + spread * 0.1, size=rows)
+            exact = rng.random(rows) < 0.25
+            X[exact, column] = rng.choice(cuts, size=int(exact.sum()))
+
+        with warnings.catch_warnings():
+            # The model was fitted on a DataFrame; plain arrays are fine here
+            warnings.simplefilter('ignore', UserWarning)
+            expected = model.predict_proba(X)
+        # Both scoring paths: the array walk used for batches and the one-donor path
+        differs = np.zeros(rows, dtype=bool)
+        for actual in (self.predict_proba(X), np.array([self.predict_one(row) for row in X])):
+            differs |= ~np.isclose(actual, expected, rtol=0, atol=1e-9).all(axis=1)
+            differs |= actual.argmax(axis=1) != expected.argmax(axis=1)
+        return int(differs.sum())
+
+    def save(self, path):
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(tmp_path, feature=self.feature, threshold=self.threshold, children=self.children,
+                            leaf_proba=self.leaf_proba, roots=self.roots, depth=self.depth,
+                            classes=self.classes, columns=np.array(self.columns))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['feature'], data['threshold'], data['children'], data['leaf_proba'],
+                       data['roots'], data['depth'], data['classes'], [str(c) for c in data['columns']])
+
+
+def parse_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    for fmt in ('%Y-%m-%d', '%d-%m-%Y'):
+        try:
+            return datetime.datetime.strptime(str(value), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date {value!r}")
+
+
+def main(argv=None):
+    # Kiosk / front-end loop: one JSON object of health fields per input line, one
+    # {"eligibility": ..., "probability": ...} per output line
+    parser = argparse.ArgumentParser(description="Screen donors from JSON lines on stdin with the compiled model")
+    parser.add_argument('--model', default=os.path.join("models", "eligibility_model.npz"))
+    args = parser.parse_args(argv)
+
+    forest = CompiledForest.load(args.model)
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            eligibility, probability = forest.screen(json.loads(line))
+            reply = {'eligibility': eligibility, 'probability': round(probability, 4)}
+        except KeyError as e:
+            reply = {'error': f"missing field {e}"}
+        except (ValueError, TypeError) as e:
+            reply = {'error': str(e)}
+        print(json.dumps(reply), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import time
+import threading
+from Metrics import instrument_connection
+
+# mysql.connector is imported where it is used: loading it takes longer than the rest of the
+# menu's startup, and the SQLite backends only need it for its exception classes.
+
+# Database configuration
+DB_CONFIG = {
+    'host': os.environ.get('BLOOD_BANK_DB_HOST', 'localhost'),
+    'user': os.environ.get('BLOOD_BANK_DB_USER', 'root'),
+    'password': os.environ.get('BLOOD_BANK_DB_PASSWORD', 'root'),
+    'database': os.environ.get('BLOOD_BANK_DB_NAME', 'blood')
+}
+
+# Pool settings; mysql.connector caps a single pool at 32 connections
+POOL_CONFIG = {
+    'pool_name': 'blood_bank',
+    'pool_size': int(os.environ.get('BLOOD_BANK_POOL_SIZE', 5)),
+    'pool_reset_session': True,
+    'connection_timeout': int(os.environ.get('BLOOD_BANK_CONNECT_TIMEOUT', 10)),
+}
+# Seconds to wait for a free connection before giving up
+POOL_WAIT_TIMEOUT = float(os.environ.get('BLOOD_BANK_POOL_WAIT', 30))
+# Ping connections on checkout and transparently reconnect ones the server dropped
+POOL_HEALTH_CHECK = os.environ.get('BLOOD_BANK_POOL_HEALTH_CHECK', '1') != '0'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    from mysql.connector import pooling
+    with _pool_lock:
+        if _pool is None:
+            _pool = pooling.MySQLConnectionPool(**POOL_CONFIG, **DB_CONFIG)
+            print(f"✅ Database pool ready ({POOL_CONFIG['pool_size']} connections)")
+    return _pool
+
+
+def get_connection(timeout=None):
+    # Whichever backend BLOOD_BANK_STORAGE selects; all of them take the same %s SQL.
+    # Statements run through it are timed under the calling operation.
+    from Storage import get_storage
+    return instrument_connection(get_storage().connect(timeout))
+
+
+def release(connection, cursor=None):
+    from Storage import get_storage
+    get_storage().release(connection, cursor)
+
+
+def is_mysql():
+    from Storage import get_storage
+    return get_storage().name == 'mysql'
+
+
+def get_mysql_connection(timeout=None):
+    import mysql.connector
+    from mysql.connector import pooling
+    pool = get_pool()
+    deadline = time.monotonic() + (POOL_WAIT_TIMEOUT if timeout is None else timeout)
+    while True:
+        try:
+            connection = pool.get_connection()
+            break
+        except pooling.PoolError:
+            # Every connection is checked out; wait for one to be released
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+
+    if POOL_HEALTH_CHECK:
+        try:
+            connection.ping(reconnect=True, attempts=2, delay=0)
+        except mysql.connector.Error:
+            connection.close()
+            raise
+    return connection
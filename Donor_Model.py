@@ -0,0 +1,299 @@
+import os
+import sys
+import copy
+import time
+import shutil
+import argparse
+import hashlib
+import datetime
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from Metrics import timed
+from Compiled_Model import CompiledForest, compiled_path
+
+DONOR_DATA_PATH = r'C:\Users\LENOVO\Desktop\Blood_Bank_System\Donor.csv'
+MODEL_PATH = os.path.join("models", "eligibility_model.joblib")
+# Bump when the artifact layout changes so old files are retrained instead of misread
+MODEL_ARTIFACT_VERSION = 1
+
+# Model inputs in training order; every scoring path builds exactly these
+FEATURE_COLUMNS = ['age', 'gender', 'hemoglobin_count', 'weight', 'pulse_rate',
+                   'blood_pressure', 'chronic_disorders', 'days_since_last_donation']
+# Donor columns copied through to batch scoring output so results can be matched back
+ID_COLUMNS = ['donor_id', 'name', 'contact_number']
+
+
+def file_hash(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_features(df, today=None):
+    if today is None:
+        today = pd.to_datetime('today')
+    features = pd.DataFrame(index=df.index)
+    for col in FEATURE_COLUMNS:
+        if col == 'gender':
+            gender = df['gender']
+            features['gender'] = gender if pd.api.types.is_numeric_dtype(gender) else gender.map({'Male': 1, 'Female': 0})
+        elif col == 'days_since_last_donation' and col not in df.columns:
+            # dd-mm-yyyy in the CSVs; dayfirst keeps every chunk parsing the same way
+            last_donation = pd.to_datetime(df['last_donation_date'], dayfirst=True, errors='coerce')
+            features[col] = (today - last_donation).dt.days
+        else:
+            features[col] = df[col]
+    return features
+
+
+class BloodDonorPredictor:
+    def __init__(self, model=None):
+        self.model = model
+        self.columns = None
+        self.user_data = None
+        self.data_hash = None
+        self.accuracy = None
+        self.trained_at = None
+        self.compiled = None
+        # The model whose compiled form failed verification, so it is not re-checked on every call
+        self.compile_failed = None
+        # Highest donor_registration.donor_id folded in or passed over by Retrain.py; None for a CSV-only model
+        self.trained_through = None
+
+    @timed('model_train')
+    def train(self, filepath):
+        df = pd.read_csv(filepath)
+        df = df.dropna()
+        X = build_features(df)
+        y = df['elgibility']
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.35, random_state=42)
+        model = RandomForestClassifier(random_state=42)
+        model.fit(X_train, y_train)
+        print("✅ Model trained successfully.")
+        # 🔍 Accuracy calculation
+        y_pred = model.predict(X_test)
+        acc = accuracy_score(y_test, y_pred)
+
+        # Only replace the current model once training has fully succeeded
+        self.model = model
+        self.compiled = None
+        self.trained_through = None
+        self.columns = X_train.columns.tolist()
+        self.accuracy = acc
+        self.data_hash = file_hash(filepath)
+        self.trained_at = datetime.datetime.now().isoformat(timespec='seconds')
+        print(f"✅ Model trained successfully with accuracy: {acc:.2f}")
+
+    @timed('model_load_data')
+    def load_data(self, filepath):
+        try:
+            self.train(filepath)
+        except Exception as e:
+            print(f"❌ Error loading data: {e}")
+            sys.exit(1)
+
+    def save_model(self, model_path=MODEL_PATH):
+        artifact = {
+            'version': MODEL_ARTIFACT_VERSION,
+            'model': self.model,
+            'columns': self.columns,
+            'data_hash': self.data_hash,
+            'accuracy': self.accuracy,
+            'trained_at': self.trained_at,
+            'trained_through': self.trained_through,
+        }
+        model_dir = os.path.dirname(model_path)
+        if model_dir and not os.path.exists(model_dir):
+            os.makedirs(model_dir)
+
+        # Keep the previous artifact around as a fallback, then swap the new one in atomically
+        if os.path.exists(model_path):
+            shutil.copy2(model_path, model_path + '.prev')
+        tmp_path = model_path + '.tmp'
+        joblib.dump(artifact, tmp_path)
+        os.replace(tmp_path, model_path)
+        print(f"✅ Model saved to: {model_path}")
+
+        # NumPy-only copy for front ends that screen donors without scikit-learn
+        compiled = self.compile()
+        if compiled is not None:
+            compiled.save(compiled_path(model_path))
+
+    def load_model(self, model_path=MODEL_PATH):
+        artifact = joblib.load(model_path)
+        if artifact.get('version') != MODEL_ARTIFACT_VERSION:
+            raise ValueError(f"unsupported model artifact version {artifact.get('version')}")
+        self.model = artifact['model']
+        self.compiled = None
+        self.columns = artifact['columns']
+        self.data_hash = artifact['data_hash']
+        self.accuracy = artifact['accuracy']
+        self.trained_at = artifact['trained_at']
+        self.trained_through = artifact.get('trained_through')
+        print(f"✅ Model loaded from: {model_path} (trained {self.trained_at}, accuracy {self.accuracy:.2f})")
+
+    def load_or_train(self, filepath=DONOR_DATA_PATH, model_path=MODEL_PATH, retrain=False):
+        current_hash = file_hash(filepath) if os.path.exists(filepath) else None
+
+        loaded = False
+        if not retrain:
+            for path in (model_path, model_path + '.prev'):
+                if not os.path.exists(path):
+                    continue
+                try:
+                    self.load_model(path)
+                    loaded = True
+                    break
+                except Exception as e:
+                    print(f"⚠ Could not load model artifact {path}: {e}")
+
+            # No source data to compare against means the artifact is all we have
+            if loaded and (current_hash is None or current_hash == self.data_hash):
+                return
+            if loaded:
+                print("⚠ Training data changed since the model was saved, retraining...")
+
+        try:
+            self.train(filepath)
+            self.save_model(model_path)
+        except Exception as e:
+            if loaded:
+                print(f"⚠ Retraining failed, keeping saved model: {e}")
+                return
+            raise RuntimeError(f"No usable model: {e}")
+
+    def clone(self):
+        # Shares the trained model but keeps per-donor input separate
+        predictor = BloodDonorPredictor(self.model)
+        predictor.columns = self.columns
+        predictor.data_hash = self.data_hash
+        predictor.accuracy = self.accuracy
+        predictor.trained_at = self.trained_at
+        predictor.compiled = self.compiled
+        predictor.compile_failed = self.compile_failed
+        predictor.trained_through = self.trained_through
+        return predictor
+
+    def compile(self):
+        # Flatten the forest for fast single-donor screening. Checked against scikit-learn
+        # first; if they disagree the compiled form is not used and predict() stays on sklearn.
+        if self.compiled is None and self.model is not None and self.compile_failed is not self.model:
+            start = time.perf_counter()
+            compiled = CompiledForest.from_sklearn(self.model, self.columns)
+            mismatches = compiled.verify(self.model)
+            if mismatches:
+                print(f"⚠ Compiled model disagrees with scikit-learn on {mismatches} probe rows; not using it")
+                self.compile_failed = self.model
+                return None
+            self.compiled = compiled
+            print(f"✅ Model compiled for fast screening in {time.perf_counter() - start:.2f}s")
+        return self.compiled
+
+    @timed('model_screen')
+    def screen(self, fields):
+        # Fast path for one donor: a dict of the eight health fields -> (eligibility, probability)
+        compiled = self.compile()
+        if compiled is None:
+            self.user_data = pd.DataFrame([fields])
+            features = build_features(self.user_data)[self.columns]
+            proba = self.model.predict_proba(features)[0][list(self.model.classes_).index(1)]
+            return ("Eligible" if proba > 0.5 else "Not Eligible"), float(proba)
+        return compiled.screen(fields)
+
+    @timed('model_predict')
+    def predict(self):
+        try:
+            self.user_data = self.user_data[self.columns]
+            compiled = self.compile()
+            if compiled is not None:
+                result, _ = compiled.screen(self.user_data.iloc[0].to_numpy())
+            else:
+                prediction = self.model.predict(self.user_data)
+                result = "Eligible" if prediction[0] == 1 else "Not Eligible"
+            print(f"\n✅ Eligibility Prediction: {result}")
+
+            return result
+        except Exception as e:
+            print(f"❌ Error during prediction: {e}")
+            return "Not Eligible"
+
+    def predict_batch(self, df, n_jobs=-1):
+        features = build_features(df)
+        complete = features.notna().all(axis=1)
+
+        result = df[[col for col in ID_COLUMNS if col in df.columns]].copy()
+        result['eligibility'] = "Incomplete"
+        result['probability'] = np.nan
+
+        if complete.any():
+            # Spread the trees over all cores for large chunks. The model is shared with the
+            # donation window and retraining on other threads, so the setting goes on a
+            # shallow copy (the fitted trees are shared, not copied).
+            model = copy.copy(self.model)
+            model.n_jobs = n_jobs
+            proba = model.predict_proba(features.loc[complete, self.columns])
+            eligible_proba = proba[:, list(self.model.classes_).index(1)]
+            result.loc[complete, 'probability'] = eligible_proba
+            result.loc[complete, 'eligibility'] = np.where(eligible_proba > 0.5, "Eligible", "Not Eligible")
+        return result
+
+    def score_chunks(self, chunks, output_path, n_jobs=-1):
+        start = time.perf_counter()
+        rows = 0
+        eligible = 0
+        for i, chunk in enumerate(chunks):
+            result = self.predict_batch(chunk, n_jobs)
+            result.to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            rows += len(result)
+            eligible += int((result['eligibility'] == "Eligible").sum())
+            elapsed = time.perf_counter() - start
+            print(f"... scored {rows} donors ({rows / elapsed:.0f} rows/s)")
+
+        elapsed = time.perf_counter() - start
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        print(f"✅ Scored {rows} donors, {eligible} eligible, in {elapsed:.2f}s ({rate:.0f} rows/s) -> {output_path}")
+        return rows, rate
+
+    def score_csv(self, input_path, output_path, chunksize=50000, n_jobs=-1):
+        return self.score_chunks(pd.read_csv(input_path, chunksize=chunksize), output_path, n_jobs)
+
+    def score_query(self, query, output_path, chunksize=50000, n_jobs=-1):
+        from Database import get_connection, release
+
+        connection = get_connection()
+        try:
+            return self.score_chunks(pd.read_sql(query, connection, chunksize=chunksize), output_path, n_jobs)
+        finally:
+            release(connection)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch donor eligibility scoring")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help="donor CSV to score (Donor.csv layout)")
+    source.add_argument('--query', nargs='?', const="SELECT * FROM donor_registration",
+                        help="score rows returned by a SQL query (default: all of donor_registration)")
+    parser.add_argument('--output', default="eligibility_scores.csv")
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--jobs', type=int, default=-1, help="parallel workers for prediction (-1 = all cores)")
+    parser.add_argument('--data', default=DONOR_DATA_PATH, help="training data for the model")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--retrain', action='store_true')
+    args = parser.parse_args(argv)
+
+    predictor = BloodDonorPredictor()
+    predictor.load_or_train(args.data, args.model, retrain=args.retrain)
+    if args.csv:
+        predictor.score_csv(args.csv, args.output, args.chunksize, args.jobs)
+    else:
+        predictor.score_query(args.query, args.output, args.chunksize, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import time
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import mysql.connector
+from Database import get_connection, release
+from Analytics_Data import ANALYTICS_SOURCE, get_dataset
+
+SEASON_LENGTH = 7           # weekly pattern in hospital demand
+SMOOTHING_GRID = (0.05, 0.1, 0.2, 0.4)
+SEASONAL_SMOOTHING = 0.1
+FORECAST_HORIZON = 14
+HISTORY_DAYS = 730
+# Forecasts are fractional; a type is only flagged once it is at least one whole bag short
+SHORTFALL_MIN_UNITS = 1.0
+# Below this many series one process is faster than shipping columns to a pool
+PARALLEL_MIN_SERIES = 2000
+
+
+def load_demand(history_days=HISTORY_DAYS, source=None):
+    # Long frame: request_date, blood_type, location, units (summed per day server-side)
+    source = source or ANALYTICS_SOURCE
+    since = datetime.today().date() - timedelta(days=history_days)
+    if source == 'mysql':
+        connection = cursor = None
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT request_date, blood_type, location, SUM(units_requested)
+                FROM blood_requests
+                WHERE request_date >= %s AND blood_type IS NOT NULL
+                GROUP BY request_date, blood_type, location
+            """, (since,))
+            rows = cursor.fetchall()
+        finally:
+            release(connection, cursor)
+        demand = pd.DataFrame(rows, columns=['request_date', 'blood_type', 'location', 'units'])
+    else:
+        requests_df = get_dataset('requests', source)
+        if requests_df is None:
+            return None
+        demand = requests_df.rename(columns={'units_requested': 'units'})
+        demand = demand[['request_date', 'blood_type', 'location', 'units']]
+        demand = demand[demand['request_date'] >= pd.Timestamp(since)]
+
+    demand = demand.dropna(subset=['request_date', 'blood_type'])
+    demand['request_date'] = pd.to_datetime(demand['request_date'])
+    demand['blood_type'] = demand['blood_type'].astype(str)
+    demand['location'] = demand['location'].fillna('Unknown').astype(str)
+    demand['units'] = pd.to_numeric(demand['units'], errors='coerce').fillna(0).astype('float64')
+    return demand
+
+
+def build_daily_series(demand, end_date=None):
+    # Dense (days x series) matrix, one column per (blood_type, location), zeros on quiet days
+    end_date = pd.Timestamp(end_date or datetime.today().date())
+    daily = demand.pivot_table(index='request_date', columns=['blood_type', 'location'],
+                               values='units', aggfunc='sum', fill_value=0.0)
+    days = pd.date_range(daily.index.min(), end_date, freq='D')
+    return daily.reindex(days, fill_value=0.0)
+
+
+def _smooth(y, alpha, gamma=SEASONAL_SMOOTHING, season_length=SEASON_LENGTH):
+    # Additive seasonal exponential smoothing over every column at once.
+    # Returns the final level, seasonal terms and the one-step-ahead squared error.
+    level = y[:season_length].mean(axis=0)
+    season = y[:season_length] - level
+    sse = np.zeros(y.shape[1])
+    for t in range(season_length, y.shape[0]):
+        slot = t % season_length
+        predicted = level + season[slot]
+        sse += (y[t] - predicted) ** 2
+        level = alpha * (y[t] - season[slot]) + (1 - alpha) * level
+        season[slot] = gamma * (y[t] - level) + (1 - gamma) * season[slot]
+    return level, season, sse
+
+
+def fit_forecast(y, horizon=FORECAST_HORIZON):
+    # y: (days x series). Each series keeps whichever smoothing level fit its own history best.
+    days, series = y.shape
+    if days < 2 * SEASON_LENGTH:
+        # Too short for a weekly pattern: flat forecast at the recent mean
+        return np.repeat(y[-SEASON_LENGTH:].mean(axis=0, keepdims=True), horizon, axis=0)
+
+    best_sse = np.full(series, np.inf)
+    best_level = np.zeros(series)
+    best_season = np.zeros((SEASON_LENGTH, series))
+    for alpha in SMOOTHING_GRID:
+        level, season, sse = _smooth(y, alpha)
+        better = sse < best_sse
+        best_sse = np.where(better, sse, best_sse)
+        best_level = np.where(better, level, best_level)
+        best_season = np.where(better, season, best_season)
+
+    slots = (days + np.arange(horizon)) % SEASON_LENGTH
+    return np.clip(best_level + best_season[slots], 0, None)
+
+
+def forecast_series(daily, horizon=FORECAST_HORIZON, workers=None):
+    # Returns (horizon days x series) with the same columns as daily
+    y = daily.to_numpy(dtype='float64')
+    if y.shape[1] >= PARALLEL_MIN_SERIES and workers != 1:
+        chunks = np.array_split(np.arange(y.shape[1]), workers or 4)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = pool.map(fit_forecast, [y[:, cols] for cols in chunks], [horizon] * len(chunks))
+            values = np.hstack(list(parts))
+    else:
+        values = fit_forecast(y, horizon)
+    index = pd.date_range(daily.index[-1] + pd.Timedelta(days=1), periods=horizon, freq='D')
+    return pd.DataFrame(values, index=index, columns=daily.columns)
+
+
+def load_stock(today=None):
+    # Active, unexpired units as {blood_type: [(expiration_date, units), ...]} soonest first
+    today = today or datetime.today().date()
+    connection = cursor = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT blood_type, expiration_date, COUNT(*)
+            FROM units2
+            WHERE status = 'active' AND expiration_date > %s
+            GROUP BY blood_type, expiration_date
+            ORDER BY expiration_date
+        """, (today,))
+        stock = {}
+        for blood_type, expiration_date, count in cursor.fetchall():
+            stock.setdefault(blood_type, []).append((expiration_date, count))
+        return stock
+    finally:
+        release(connection, cursor)
+
+
+def project_shortages(forecast_by_type, stock):
+    # Walk the horizon day by day, using stock first-expiring first and dropping bags on
+    # their expiration date. Returns one row per blood type.
+    rows = []
+    for blood_type in forecast_by_type.columns:
+        batches = [[expiration_date, count] for expiration_date, count in stock.get(blood_type, [])]
+        usable = sum(count for _, count in batches)
+        shortfall = 0.0
+        first_short = None
+        for day, needed in forecast_by_type[blood_type].items():
+            day = day.date()
+            batches = [batch for batch in batches if batch[0] > day]
+            for batch in batches:
+                take = min(batch[1], needed)
+                batch[1] -= take
+                needed -= take
+                if needed <= 0:
+                    break
+            if needed > 0:
+                shortfall += needed
+                if first_short is None and shortfall >= SHORTFALL_MIN_UNITS:
+                    first_short = day
+        if first_short is None:
+            shortfall = 0.0
+        rows.append({
+            'blood_type': blood_type,
+            'forecast_units': float(forecast_by_type[blood_type].sum()),
+            'usable_units': usable,
+            'shortfall': round(shortfall, 1),
+            'first_short_date': first_short,
+        })
+    return pd.DataFrame(rows, columns=['blood_type', 'forecast_units', 'usable_units', 'shortfall',
+                                       'first_short_date'])
+
+
+def forecast_summary(horizon=FORECAST_HORIZON, history_days=HISTORY_DAYS, workers=None, source=None):
+    # Forecast per (blood_type, location), rolled up per blood type and checked against stock
+    start = time.perf_counter()
+    demand = load_demand(history_days, source)
+    if demand is None or demand.empty:
+        print("⚠ No request history to forecast from")
+        return None
+    daily = build_daily_series(demand)
+    forecast = forecast_series(daily, horizon, workers)
+    forecast_by_type = forecast.T.groupby(level='blood_type').sum().T
+    summary = project_shortages(forecast_by_type, load_stock())
+    elapsed = time.perf_counter() - start
+    print(f"✅ Forecast {daily.shape[1]} series over {daily.shape[0]} days of history in {elapsed:.2f}s")
+    return summary
+
+
+def print_alerts(summary, horizon=FORECAST_HORIZON):
+    for row in summary.itertuples(index=False):
+        if row.shortfall > 0:
+            print(f"⚠ {row.blood_type}: {row.forecast_units:.0f} units expected over {horizon} days, "
+                  f"{row.usable_units} usable; short by {row.shortfall:.0f} from {row.first_short_date}")
+        else:
+            print(f"✅ {row.blood_type}: {row.forecast_units:.0f} units expected, {row.usable_units} usable")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forecast blood demand per type and flag coming shortages")
+    parser.add_argument('--horizon', type=int, default=FORECAST_HORIZON, help="days to look ahead")
+    parser.add_argument('--history-days', type=int, default=HISTORY_DAYS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chart', metavar='PATH', help="also save the forecast chart (png/svg)")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = forecast_summary(args.horizon, args.history_days, args.workers)
+    except mysql.connector.Error as err:
+        print(f"❌ Database error: {err}")
+        return
+    if summary is None:
+        return
+    print_alerts(summary, args.horizon)
+
+    if args.chart:
+        import matplotlib
+        matplotlib.use('Agg')
+        from Graph import apply_plot_style, plot_demand_forecast
+        apply_plot_style()
+        plot_demand_forecast(summary, show=False).savefig(args.chart, dpi=150)
+        print(f"✅ Forecast chart saved to {args.chart}")
+
+
+if __name__ == "__main__":
+    main()
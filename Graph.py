@@ -1,9 +1,16 @@
-import pandas as pd
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 import tkinter as tk
 from tkinter import simpledialog, messagebox, ttk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from Analytics_Data import donors_by_blood_type, donations_by_month, requested_vs_available, stock_trend
+from Forecast import forecast_summary, FORECAST_HORIZON
 
 def apply_plot_style():
     sns.set_theme(style="whitegrid")
@@ -13,103 +20,214 @@ def apply_plot_style():
     plt.rcParams['xtick.labelsize'] = 12
     plt.rcParams['ytick.labelsize'] = 12
 
-def load_data(file_path):
-    try:
-        df = pd.read_csv(file_path)
-        print(f"✅ Data successfully loaded from: {file_path}")
-        return df
-    except Exception as e:
-        print(f"❌ Error loading data: {e}")
-        return None
+def _new_axes(ax, figsize, show):
+    # Plotters draw on the Axes they are given. Standalone they get a figure of their own,
+    # made through pyplot only when it has to open a window.
+    if ax is not None:
+        return ax
+    if show:
+        return plt.subplots(figsize=figsize)[1]
+    return Figure(figsize=figsize).add_subplot()
+
+def _finish(ax, show):
+    ax.figure.tight_layout()
+    if show:
+        plt.show()
+    return ax.figure
+
+def _no_data(ax, title):
+    ax.set_title(title)
+    ax.text(0.5, 0.5, "No data available", ha='center', va='center', transform=ax.transAxes)
 
-def plot_donors_by_blood_type(df, show=True):
-    if df is None:
+def plot_donors_by_blood_type(blood_type_counts, show=True, ax=None):
+    if blood_type_counts is None and ax is None:
         return None
-        
-    fig = plt.figure(figsize=(10, 6))
-    blood_type_counts = df['blood_type'].value_counts()
-    sns.barplot(x=blood_type_counts.index, y=blood_type_counts.values, 
-                palette="muted", edgecolor='black')
+    ax = _new_axes(ax, (10, 6), show)
+    if blood_type_counts is None:
+        _no_data(ax, 'Number of Donors by Blood Type')
+        return ax.figure
+
+    sns.barplot(x=blood_type_counts.index, y=blood_type_counts.values, hue=blood_type_counts.index,
+                palette="muted", edgecolor='black', legend=False, ax=ax)
 
     for i, value in enumerate(blood_type_counts.values):
-        plt.text(i, value + 0.5, int(value), ha='center', va='bottom', fontsize=11)
+        ax.text(i, value + 0.5, int(value), ha='center', va='bottom', fontsize=11)
 
-    plt.title('Number of Donors by Blood Type')
-    plt.xlabel('Blood Type')
-    plt.ylabel('Number of Donors')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    
-    if show:
-        plt.show()
-    return fig
+    ax.set_title('Number of Donors by Blood Type')
+    ax.set_xlabel('Blood Type')
+    ax.set_ylabel('Number of Donors')
+    ax.tick_params(axis='x', rotation=45)
+    return _finish(ax, show)
 
-def plot_donations_by_month(df, show=True):
-    if df is None:
+def plot_donations_by_month(donation_counts, show=True, ax=None):
+    if donation_counts is None and ax is None:
         return None
-        
-    fig = plt.figure(figsize=(12, 6))
-    df['last_donation_date'] = pd.to_datetime(df['last_donation_date'], format='%d-%m-%Y', errors='coerce')
-    df['month_year'] = df['last_donation_date'].dt.strftime('%Y-%b')
-    donation_counts = df['month_year'].value_counts().sort_index()
+    ax = _new_axes(ax, (12, 6), show)
+    if donation_counts is None:
+        _no_data(ax, 'Number of Donations by Month')
+        return ax.figure
 
-    sns.barplot(x=donation_counts.index, y=donation_counts.values, 
-                palette="Blues_r", edgecolor='black')
+    labels = donation_counts.index.strftime('%Y-%b')
+    sns.barplot(x=labels, y=donation_counts.values, hue=labels,
+                palette="Blues_r", edgecolor='black', legend=False, ax=ax)
 
     for i, value in enumerate(donation_counts.values):
-        plt.text(i, value + 0.5, int(value), ha='center', va='bottom', fontsize=11)
+        ax.text(i, value + 0.5, int(value), ha='center', va='bottom', fontsize=11)
 
-    plt.title('Number of Donations by Month')
-    plt.xlabel('Month-Year')
-    plt.ylabel('Number of Donations')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    
-    if show:
-        plt.show()
-    return fig
+    ax.set_title('Number of Donations by Month')
+    ax.set_xlabel('Month-Year')
+    ax.set_ylabel('Number of Donations')
+    ax.tick_params(axis='x', rotation=45)
+    return _finish(ax, show)
 
-def plot_requested_vs_available(requests_df, donations_df, show=True):
-    if requests_df is None or donations_df is None:
+def plot_requested_vs_available(units_comparison, show=True, ax=None):
+    if units_comparison is None and ax is None:
         return None
-        
-    fig = plt.figure(figsize=(12, 6))
-    active_donations_df = donations_df[donations_df['status'].str.lower() == 'active']
-    active_donations_df['units_available'] = active_donations_df['quantity_ml'] / 500
+    ax = _new_axes(ax, (12, 6), show)
+    if units_comparison is None:
+        _no_data(ax, 'Blood Units: Requested vs Available')
+        return ax.figure
+
+    bar_width = 0.4
+    x = range(len(units_comparison))
+
+    ax.bar(x, units_comparison['units_requested'], width=bar_width, 
+           label='Requested Units', color='salmon', edgecolor='black')
+    ax.bar([p + bar_width for p in x], units_comparison['units_available'], 
+           width=bar_width, label='Available Units', color='lightgreen', edgecolor='black')
+
+    ax.set_xlabel('Blood Type')
+    ax.set_ylabel('Units')
+    ax.set_title('Blood Units: Requested vs Available')
+    ax.set_xticks([p + bar_width/2 for p in x], units_comparison['blood_type'])
+    ax.legend()
+    return _finish(ax, show)
+
+def plot_stock_trend(active_by_type, show=True, ax=None):
+    # active_by_type: one row per snapshot day, one column per blood type
+    if active_by_type is None and ax is None:
+        return None
+    ax = _new_axes(ax, (12, 6), show)
+    if active_by_type is None:
+        _no_data(ax, 'Active Units Over Time')
+        return ax.figure
+
+    for blood_type in active_by_type.columns:
+        ax.plot(active_by_type.index, active_by_type[blood_type], marker='o', markersize=3, label=blood_type)
 
-    available_units = active_donations_df.groupby('blood_type')['units_available'].sum().reset_index()
-    requested_units = requests_df.groupby('blood_type')['units_requested'].sum().reset_index()
+    ax.set_title('Active Units Over Time')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Active Units')
+    ax.tick_params(axis='x', rotation=45)
+    ax.legend(ncol=4, fontsize=10)
+    return _finish(ax, show)
 
-    units_comparison = pd.merge(requested_units, available_units, on='blood_type', how='outer').fillna(0)
+def plot_demand_forecast(summary, show=True, ax=None):
+    # summary: Forecast.forecast_summary() — expected demand vs usable stock per blood type
+    if summary is None and ax is None:
+        return None
+    ax = _new_axes(ax, (12, 6), show)
+    title = f'Forecast Demand vs Usable Stock (next {FORECAST_HORIZON} days)'
+    if summary is None:
+        _no_data(ax, title)
+        return ax.figure
 
     bar_width = 0.4
-    x = range(len(units_comparison))
+    x = range(len(summary))
+    colors = ['indianred' if shortfall > 0 else 'steelblue' for shortfall in summary['shortfall']]
 
-    plt.bar(x, units_comparison['units_requested'], width=bar_width, 
-            label='Requested Units', color='salmon', edgecolor='black')
-    plt.bar([p + bar_width for p in x], units_comparison['units_available'], 
-            width=bar_width, label='Available Units', color='lightgreen', edgecolor='black')
-
-    plt.xlabel('Blood Type')
-    plt.ylabel('Units')
-    plt.title('Blood Units: Requested vs Available')
-    plt.xticks([p + bar_width/2 for p in x], units_comparison['blood_type'])
-    plt.legend()
-    plt.tight_layout()
-    
-    if show:
-        plt.show()
+    ax.bar(x, summary['forecast_units'], width=bar_width, label='Forecast Demand',
+           color=colors, edgecolor='black')
+    ax.bar([p + bar_width for p in x], summary['usable_units'], width=bar_width,
+           label='Usable Stock', color='lightgreen', edgecolor='black')
+    for i, row in enumerate(summary.itertuples(index=False)):
+        if row.shortfall > 0:
+            ax.text(i, row.forecast_units + 0.5, f"short {row.shortfall:.0f}", ha='center', va='bottom',
+                    fontsize=10, color='darkred')
+
+    ax.set_xlabel('Blood Type')
+    ax.set_ylabel('Units')
+    ax.set_title(title)
+    ax.set_xticks([p + bar_width/2 for p in x], summary['blood_type'])
+    ax.legend()
+    return _finish(ax, show)
+
+def plot_dashboard(blood_type_counts, donation_counts, units_comparison, fig=None):
+    # All charts on one figure: two small ones on top, the comparison across the bottom
+    fig = fig or Figure(figsize=(16, 12))
+    grid = fig.add_gridspec(2, 2)
+    plot_donors_by_blood_type(blood_type_counts, show=False, ax=fig.add_subplot(grid[0, 0]))
+    plot_donations_by_month(donation_counts, show=False, ax=fig.add_subplot(grid[0, 1]))
+    plot_requested_vs_available(units_comparison, show=False, ax=fig.add_subplot(grid[1, :]))
+    fig.tight_layout()
     return fig
 
+# name -> (plotter, figure size); the dashboard is rendered alongside them
+CHARTS = {
+    'donors_by_blood_type': (plot_donors_by_blood_type, (10, 6)),
+    'donations_by_month': (plot_donations_by_month, (12, 6)),
+    'requested_vs_available': (plot_requested_vs_available, (12, 6)),
+    'stock_trend': (plot_stock_trend, (12, 6)),
+    'demand_forecast': (plot_demand_forecast, (12, 6)),
+}
+
+# name -> what loads its data; each chart only pays for the queries it needs
+CHART_DATA = {
+    'donors_by_blood_type': donors_by_blood_type,
+    'donations_by_month': donations_by_month,
+    'requested_vs_available': requested_vs_available,
+    'stock_trend': stock_trend,
+    'demand_forecast': forecast_summary,
+}
+
+def load_chart_data(names=None):
+    data = {}
+    for name in names or CHART_DATA:
+        try:
+            data[name] = CHART_DATA[name]()
+        except Exception as e:
+            print(f"❌ Error loading {name}: {e}")
+            data[name] = None
+    return data
+
+def init_export_worker():
+    matplotlib.use('Agg')
+    apply_plot_style()
+
+def render_chart_job(job):
+    # Module-level so it can run in a worker process; the data is already aggregated
+    name, data, output_dir, fmt, dpi = job
+    if name == 'dashboard':
+        fig = plot_dashboard(data['donors_by_blood_type'], data['donations_by_month'],
+                             data['requested_vs_available'])
+    else:
+        plotter, figsize = CHARTS[name]
+        fig = plotter(data, show=False, ax=Figure(figsize=figsize).add_subplot())
+    path = os.path.join(output_dir, f"{name}.{fmt}")
+    fig.savefig(path, format=fmt, dpi=dpi)
+    return path
+
+def export_charts(output_dir="charts", formats=("png",), dashboard=True, workers=None, dpi=150):
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    data = load_chart_data()
+
+    jobs = [(name, data[name], output_dir, fmt, dpi) for name in CHARTS for fmt in formats]
+    if dashboard:
+        jobs += [('dashboard', data, output_dir, fmt, dpi) for fmt in formats]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_export_worker) as pool:
+        paths = list(pool.map(render_chart_job, jobs))
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {len(paths)} charts exported to {output_dir} in {elapsed:.2f}s")
+    return paths
+
 def show_analytics_menu(parent_window=None):
     """Show analytics selection menu"""
     apply_plot_style()
     
-    # Load data
-    donor_df = load_data(r"C:\Users\LENOVO\Desktop\Blood_Bank_System\Donor.csv")
-    request_df = load_data(r"C:\Users\LENOVO\Desktop\Blood_Bank_System\blood_requests .csv")
-    donation_df = load_data(r"C:\Users\LENOVO\Desktop\Blood_Bank_System\Blood_units_dataset.csv")
-    
+    # Data is loaded per chart when it is picked (aggregated in MySQL, a few rows each)
     # In standalone mode, use console menu
     if parent_window is None:
         while True:
@@ -117,21 +235,27 @@ def show_analytics_menu(parent_window=None):
             print("1. Show Number of Donors by Blood Type")
             print("2. Show Number of Donations by Month")
             print("3. Show Blood Units Requested vs Available")
-            print("4. Exit")
+            print("4. Show Stock Trend")
+            print("5. Show Demand Forecast")
+            print("6. Exit")
 
-            choice = input("Enter your choice (1-4): ").strip()
+            choice = input("Enter your choice (1-6): ").strip()
 
             if choice == '1':
-                plot_donors_by_blood_type(donor_df)
+                plot_donors_by_blood_type(load_chart_data(['donors_by_blood_type'])['donors_by_blood_type'])
             elif choice == '2':
-                plot_donations_by_month(donor_df)
+                plot_donations_by_month(load_chart_data(['donations_by_month'])['donations_by_month'])
             elif choice == '3':
-                plot_requested_vs_available(request_df, donation_df)
+                plot_requested_vs_available(load_chart_data(['requested_vs_available'])['requested_vs_available'])
             elif choice == '4':
+                plot_stock_trend(load_chart_data(['stock_trend'])['stock_trend'])
+            elif choice == '5':
+                plot_demand_forecast(load_chart_data(['demand_forecast'])['demand_forecast'])
+            elif choice == '6':
                 print("👋 Exiting. Thank you!")
                 break
             else:
-                print("❌ Invalid choice. Please select 1-4.")
+                print("❌ Invalid choice. Please select 1-6.")
         return
     
     # In GUI mode, show dialog
@@ -141,11 +265,13 @@ def show_analytics_menu(parent_window=None):
         "1. Show Donors by Blood Type\n"
         "2. Show Donations by Month\n"
         "3. Show Requested vs Available\n"
-        "4. Show All\n\n"
-        "Enter choice (1-4):",
+        "4. Show All\n"
+        "5. Show Stock Trend\n"
+        "6. Show Demand Forecast\n\n"
+        "Enter choice (1-6):",
         parent=parent_window,
         minvalue=1,
-        maxvalue=4
+        maxvalue=6
     )
     
     if choice is None:  # User cancelled
@@ -156,26 +282,34 @@ def show_analytics_menu(parent_window=None):
     plot_window.title("Blood Bank Analytics")
     plot_window.geometry("1000x800")
     
+    names = {1: ['donors_by_blood_type'], 2: ['donations_by_month'], 3: ['requested_vs_available'],
+             4: ['donors_by_blood_type', 'donations_by_month', 'requested_vs_available'],
+             5: ['stock_trend'], 6: ['demand_forecast']}[choice]
+    data = load_chart_data(names)
+    blood_type_counts = data.get('donors_by_blood_type')
+    donation_counts = data.get('donations_by_month')
+    units_comparison = data.get('requested_vs_available')
+    active_by_type = data.get('stock_trend')
+    demand_forecast = data.get('demand_forecast')
+
     # Generate the selected plot(s)
     if choice == 1:
-        fig = plot_donors_by_blood_type(donor_df, show=False)
+        fig = plot_donors_by_blood_type(blood_type_counts, show=False)
     elif choice == 2:
-        fig = plot_donations_by_month(donor_df, show=False)
+        fig = plot_donations_by_month(donation_counts, show=False)
     elif choice == 3:
-        fig = plot_requested_vs_available(request_df, donation_df, show=False)
+        fig = plot_requested_vs_available(units_comparison, show=False)
     elif choice == 4:
-        fig = plt.figure(figsize=(12, 10))
-        
-        plt.subplot(2, 2, 1)
-        plot_donors_by_blood_type(donor_df, show=False)
-        
-        plt.subplot(2, 2, 2)
-        plot_donations_by_month(donor_df, show=False)
-        
-        plt.subplot(2, 1, 2)
-        plot_requested_vs_available(request_df, donation_df, show=False)
-        
-        plt.tight_layout()
+        fig = plot_dashboard(blood_type_counts, donation_counts, units_comparison, Figure(figsize=(12, 10)))
+    elif choice == 5:
+        fig = plot_stock_trend(active_by_type, show=False)
+    elif choice == 6:
+        fig = plot_demand_forecast(demand_forecast, show=False)
+
+    if fig is None:
+        plot_window.destroy()
+        messagebox.showerror("Analytics", "No data available for this chart.")
+        return
     
     # Display in Tkinter window
     canvas = FigureCanvasTkAgg(fig, master=plot_window)
@@ -185,5 +319,22 @@ def show_analytics_menu(parent_window=None):
     # Close button
     ttk.Button(plot_window, text="Close", command=plot_window.destroy).pack(pady=10)
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Blood bank analytics charts")
+    parser.add_argument('--export', metavar='DIR',
+                        help="render every chart headless (Agg) into DIR instead of opening the menu")
+    parser.add_argument('--format', nargs='+', choices=['png', 'svg'], default=['png'])
+    parser.add_argument('--no-dashboard', action='store_true', help="skip the combined dashboard image")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--dpi', type=int, default=150)
+    args = parser.parse_args(argv)
+
+    if args.export:
+        matplotlib.use('Agg')
+        apply_plot_style()
+        export_charts(args.export, args.format, not args.no_dashboard, args.workers, args.dpi)
+    else:
+        show_analytics_menu()
+
 if __name__ == "__main__":
-    show_analytics_menu()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,119 @@
+import heapq
+import threading
+from datetime import datetime
+from Blood_Types import BLOOD_COMPATIBILITY
+from Database import get_connection, release
+
+
+class InventoryLedger:
+    # In-process mirror of the active units in units2, kept as one expiry-ordered heap per
+    # blood type. MySQL stays the source of truth: allocations still lock rows there, the
+    # ledger only answers stock and feasibility questions without a round trip.
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.heaps = {blood_type: [] for blood_type in BLOOD_COMPATIBILITY}
+        self.units = {}     # blood_id -> (blood_type, expiration_date) for live entries
+        self.counts = {blood_type: 0 for blood_type in BLOOD_COMPATIBILITY}
+
+    def load(self, cursor):
+        today = datetime.today().date()
+        cursor.execute("""
+            SELECT blood_id, blood_type, expiration_date
+            FROM units2
+            WHERE status = 'active' AND expiration_date > %s
+        """, (today,))
+        rows = cursor.fetchall()
+        with self.lock:
+            self._reset()
+            for blood_id, blood_type, expiration_date in rows:
+                if blood_type in self.heaps:
+                    self.heaps[blood_type].append((expiration_date, blood_id))
+                    self.units[blood_id] = (blood_type, expiration_date)
+                    self.counts[blood_type] += 1
+            for heap in self.heaps.values():
+                heapq.heapify(heap)
+            self.loaded = True
+        print(f"✅ Inventory ledger loaded with {len(self.units)} active units")
+
+    def refresh(self):
+        import mysql.connector
+        connection = cursor = None
+        try:
+            connection = get_connection()
+            cursor = connection.cursor()
+            self.load(cursor)
+            return True
+        except mysql.connector.Error as err:
+            print(f"❌ Could not load inventory ledger: {err}")
+            return False
+        finally:
+            release(connection, cursor)
+
+    def ensure_loaded(self):
+        return self.loaded or self.refresh()
+
+    def add(self, blood_id, blood_type, expiration_date):
+        with self.lock:
+            # Before the first load the full snapshot will include this unit anyway
+            if not self.loaded or blood_type not in self.heaps or blood_id in self.units:
+                return
+            heapq.heappush(self.heaps[blood_type], (expiration_date, blood_id))
+            self.units[blood_id] = (blood_type, expiration_date)
+            self.counts[blood_type] += 1
+
+    def remove(self, blood_ids):
+        # Lazy deletion: heap entries without a live unit are skipped and pruned later
+        with self.lock:
+            for blood_id in blood_ids:
+                unit = self.units.pop(blood_id, None)
+                if unit is not None:
+                    self.counts[unit[0]] -= 1
+
+    def _prune(self, blood_type, today):
+        heap = self.heaps[blood_type]
+        while heap:
+            expiration_date, blood_id = heap[0]
+            live = self.units.get(blood_id)
+            if live is not None and live[1] == expiration_date and expiration_date > today:
+                break
+            heapq.heappop(heap)
+            if live is not None and live[1] == expiration_date:
+                # Expired in place; it no longer counts as stock
+                del self.units[blood_id]
+                self.counts[blood_type] -= 1
+
+    def stock(self, blood_type, today=None):
+        today = today or datetime.today().date()
+        with self.lock:
+            self._prune(blood_type, today)
+            return self.counts[blood_type]
+
+    def stock_by_type(self, today=None):
+        return {blood_type: self.stock(blood_type, today) for blood_type in sorted(self.heaps)}
+
+    def first_expiring(self, limits, today=None):
+        # (blood_id, blood_type, expiration_date) for the first `limit` live units of each
+        # type to expire; the rows Allocation.load_candidate_units reads from units2
+        today = today or datetime.today().date()
+        units = []
+        with self.lock:
+            for blood_type, limit in limits.items():
+                if blood_type not in self.heaps:
+                    continue
+                self._prune(blood_type, today)
+                live = [(expiration_date, blood_id) for expiration_date, blood_id in self.heaps[blood_type]
+                        if self.units.get(blood_id) == (blood_type, expiration_date) and expiration_date > today]
+                units.extend((blood_id, blood_type, expiration_date)
+                             for expiration_date, blood_id in heapq.nsmallest(limit, live))
+        return units
+
+
+_ledger = InventoryLedger()
+
+
+def get_ledger():
+    return _ledger
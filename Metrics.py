@@ -0,0 +1,368 @@
+import os
+import re
+import io
+import json
+import time
+import atexit
+import threading
+import functools
+import contextlib
+from collections import defaultdict
+
+# In-process timers and counters for the hot paths. Operations are timed with @timed or
+# timer(); database statements issued inside them are timed too, labelled with the
+# operation and statement, so a slow donation can be traced to the model, the INSERT,
+# the certificate or the QR rendering. Nothing here touches the network: the registry
+# is written to a Prometheus text file (for node_exporter's textfile collector) or JSON.
+METRICS_ENABLED = os.environ.get('BLOOD_BANK_METRICS', '1') != '0'
+# Written every METRICS_EXPORT_INTERVAL seconds and at exit; .json gives JSON, anything else Prometheus text
+METRICS_FILE = os.environ.get('BLOOD_BANK_METRICS_FILE')
+METRICS_EXPORT_INTERVAL = float(os.environ.get('BLOOD_BANK_METRICS_INTERVAL', 60))
+# Where a cProfile capture is written when it is stopped
+PROFILE_PATH = os.environ.get('BLOOD_BANK_PROFILE_PATH', 'blood_bank.prof')
+
+METRIC_PREFIX = 'blood_bank_'
+# Upper bounds in seconds, from a single indexed lookup up to model training
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    'operation_seconds': "Time spent in an instrumented operation",
+    'operation_errors_total': "Instrumented operations that raised",
+    'db_query_seconds': "Time spent executing one database statement",
+    'db_queries_total': "Database statements executed",
+}
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation, as Prometheus would estimate it
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+_histograms = defaultdict(dict)   # name -> {labels tuple: Histogram}
+_counters = defaultdict(dict)     # name -> {labels tuple: float}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def _labels(**labels):
+    return tuple(sorted(labels.items()))
+
+
+def observe(name, seconds, **labels):
+    key = _labels(**labels)
+    with _lock:
+        histogram = _histograms[name].get(key)
+        if histogram is None:
+            histogram = _histograms[name][key] = Histogram()
+        histogram.observe(seconds)
+
+
+def count(name, amount=1, **labels):
+    key = _labels(**labels)
+    with _lock:
+        _counters[name][key] = _counters[name].get(key, 0) + amount
+
+
+def current_operation():
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if stack else None
+
+
+@contextlib.contextmanager
+def timer(operation):
+    if not METRICS_ENABLED:
+        yield
+        return
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    profile = _start_region_profile() if not stack else None
+    stack.append(operation)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        count('operation_errors_total', operation=operation)
+        raise
+    finally:
+        observe('operation_seconds', time.perf_counter() - start, operation=operation)
+        stack.pop()
+        if profile is not None:
+            _finish_region_profile(profile)
+
+
+def timed(operation):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(operation):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---- database statements ----
+_VERB = re.compile(r"^\s*(\w+)")
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE(?: IF NOT EXISTS)?|ON)\s+(\w+)", re.I)
+_statement_labels = {}
+
+
+def statement_label(sql):
+    # "select units2", "update blood_requests", ...; the few distinct statements are cached
+    label = _statement_labels.get(sql)
+    if label is None:
+        verb = _VERB.match(sql)
+        table = _TABLE.search(sql)
+        parts = ([verb.group(1).lower()] if verb else []) + ([table.group(1)] if table else [])
+        label = ' '.join(parts) or 'other'
+        _statement_labels[sql] = label
+    return label
+
+
+class InstrumentedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _timed(self, method, sql, *args):
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            labels = {'operation': current_operation() or 'none', 'statement': statement_label(sql)}
+            observe('db_query_seconds', time.perf_counter() - start, **labels)
+            count('db_queries_total', **labels)
+
+    def execute(self, sql, *args, **kwargs):
+        return self._timed(functools.partial(self._cursor.execute, **kwargs), sql, *args)
+
+    def executemany(self, sql, *args):
+        return self._timed(self._cursor.executemany, sql, *args)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def instrument_connection(connection):
+    return InstrumentedConnection(connection) if METRICS_ENABLED and connection is not None else connection
+
+
+# ---- export ----
+def snapshot():
+    with _lock:
+        histograms = {name: {key: (list(h.counts), h.sum, h.count, h.max, h.buckets, h.quantile(0.5),
+                                   h.quantile(0.9), h.quantile(0.99))
+                             for key, h in series.items()}
+                      for name, series in _histograms.items()}
+        counters = {name: dict(series) for name, series in _counters.items()}
+    return histograms, counters
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def to_prometheus():
+    histograms, counters = snapshot()
+    out = io.StringIO()
+    for name, series in sorted(histograms.items()):
+        metric = METRIC_PREFIX + name
+        out.write(f"# HELP {metric} {HELP.get(name, name)}\n# TYPE {metric} histogram\n")
+        for key, (counts, total, observations, _, buckets, *_) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                out.write(f"{metric}_bucket{_format_labels(key, [('le', bound)])} {cumulative}\n")
+            out.write(f"{metric}_sum{_format_labels(key)} {total:.6f}\n")
+            out.write(f"{metric}_count{_format_labels(key)} {observations}\n")
+    for name, series in sorted(counters.items()):
+        metric = METRIC_PREFIX + name
+        out.write(f"# HELP {metric} {HELP.get(name, name)}\n# TYPE {metric} counter\n")
+        for key, value in sorted(series.items()):
+            out.write(f"{metric}{_format_labels(key)} {value}\n")
+    return out.getvalue()
+
+
+def to_json():
+    histograms, counters = snapshot()
+    report = {'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'histograms': {}, 'counters': {}}
+    for name, series in histograms.items():
+        report['histograms'][name] = [{
+            'labels': dict(key),
+            'count': observations,
+            'sum_s': round(total, 6),
+            'mean_ms': round(total / observations * 1000, 3) if observations else None,
+            'max_ms': round(maximum * 1000, 3),
+            'p50_le_s': p50, 'p90_le_s': p90, 'p99_le_s': p99,
+            'buckets': dict(zip([str(b) for b in buckets] + ['+Inf'], counts)),
+        } for key, (counts, total, observations, maximum, buckets, p50, p90, p99) in series.items()]
+    for name, series in counters.items():
+        report['counters'][name] = [{'labels': dict(key), 'value': value} for key, value in series.items()]
+    return json.dumps(report, indent=2)
+
+
+def export(path=None):
+    path = path or METRICS_FILE
+    if not path:
+        return None
+    text = to_json() if path.endswith('.json') else to_prometheus()
+    # Write then rename so a scraper never reads a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
+
+
+_exporter = None
+
+
+def start_exporter(path=None, interval=METRICS_EXPORT_INTERVAL):
+    # Daemon thread rewriting the metrics file; also written once more at exit
+    global _exporter
+    path = path or METRICS_FILE
+    if not path or _exporter is not None:
+        return None
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                export(path)
+            except OSError as e:
+                print(f"⚠ Could not write metrics to {path}: {e}")
+
+    _exporter = threading.Thread(target=loop, name="metrics-exporter", daemon=True)
+    _exporter.start()
+    atexit.register(export, path)
+    print(f"✅ Writing metrics to {path} every {interval:.0f}s")
+    return _exporter
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+# ---- cProfile capture ----
+# While a capture is running, each outermost instrumented operation runs under its own
+# profiler on whichever thread it is on; stopping merges them into one pstats file.
+_profiling = False
+_profiles = []
+_profile_lock = threading.Lock()
+
+
+def _start_region_profile():
+    if not _profiling:
+        return None
+    import cProfile
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Newer Pythons allow one active profiler per process; this region goes unprofiled
+        return None
+    return profile
+
+
+def _finish_region_profile(profile):
+    profile.disable()
+    with _profile_lock:
+        if _profiling:
+            _profiles.append(profile)
+
+
+def profiling():
+    return _profiling
+
+
+def start_profiling():
+    global _profiling
+    with _profile_lock:
+        _profiles.clear()
+        _profiling = True
+    print("✅ Profiling started")
+
+
+def stop_profiling(path=None, top=20):
+    global _profiling
+    import pstats
+    path = path or PROFILE_PATH
+    with _profile_lock:
+        _profiling = False
+        profiles = list(_profiles)
+        _profiles.clear()
+    if not profiles:
+        print("⚠ Profiling stopped; no instrumented operation ran while it was on")
+        return None
+    stats = pstats.Stats(profiles[0])
+    for profile in profiles[1:]:
+        stats.add(profile)
+    stats.dump_stats(path)
+    print(f"✅ Profile of {len(profiles)} operations saved to {path}")
+    stats.sort_stats('cumulative').print_stats(top)
+    return path
+
+
+def toggle_profiling(path=None):
+    if _profiling:
+        return stop_profiling(path)
+    start_profiling()
+    return None
+
+
+def install_profile_signal(signum=None):
+    # kill -USR1 <pid> starts a capture, the next one stops and saves it (POSIX only)
+    import signal
+    signum = signum or getattr(signal, 'SIGUSR1', None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signum, lambda *_: toggle_profiling())
+    return True
@@ -0,0 +1,216 @@
+from Database import get_connection, release, is_mysql
+
+# (version, description, statements) — append new entries, never edit applied ones
+MIGRATIONS = [
+    (1, "base tables", [
+        """
+        CREATE TABLE IF NOT EXISTS units2 (
+            blood_id INT AUTO_INCREMENT PRIMARY KEY,
+            blood_type VARCHAR(5),
+            quantity_ml INT,
+            donor_id INT,
+            donation_date DATE,
+            expiration_date DATE,
+            status VARCHAR(20) DEFAULT 'active'
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS blood_requests (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            blood_type VARCHAR(5),
+            request_date DATE,
+            location VARCHAR(100),
+            hospital_name VARCHAR(150),
+            contact_number VARCHAR(15),
+            status VARCHAR(20) DEFAULT 'pending',
+            units_requested INT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS donor_registration (
+            donor_id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100),
+            age INT,
+            gender VARCHAR(10),
+            hemoglobin_count FLOAT,
+            blood_type VARCHAR(5),
+            last_donation_date DATE,
+            location VARCHAR(100),
+            contact_number VARCHAR(15),
+            weight FLOAT,
+            pulse_rate INT,
+            blood_pressure INT,
+            chronic_disorders INT,
+            elgibility VARCHAR(20)
+        )
+        """,
+    ]),
+    (2, "hot-path indexes", [
+        # Allocation.load_candidate_units: status = 'active' AND blood_type = ? AND expiration_date > ? ORDER BY expiration_date
+        "CREATE INDEX idx_units2_status_type_expiry ON units2 (status, blood_type, expiration_date)",
+        # process_approved_requests: WHERE status = 'approved' (InnoDB appends the primary key)
+        "CREATE INDEX idx_blood_requests_status ON blood_requests (status)",
+        "CREATE INDEX idx_donor_registration_blood_type ON donor_registration (blood_type)",
+        "CREATE INDEX idx_donor_registration_contact ON donor_registration (contact_number)",
+    ]),
+    (3, "request allocations", [
+        # Which units went to which request; the unique blood_id makes double allocation impossible
+        """
+        CREATE TABLE IF NOT EXISTS request_allocations (
+            request_id INT NOT NULL,
+            blood_id INT NOT NULL,
+            allocated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (request_id, blood_id),
+            UNIQUE KEY uq_request_allocations_blood (blood_id)
+        )
+        """,
+    ]),
+    (4, "bulk import checkpoints", [
+        # One row per imported file (keyed by content hash), committed with each chunk
+        """
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            source VARCHAR(100) PRIMARY KEY,
+            kind VARCHAR(20),
+            filename VARCHAR(255),
+            rows_done BIGINT DEFAULT 0,
+            rows_loaded BIGINT DEFAULT 0,
+            rows_rejected BIGINT DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (5, "database viewer date indexes", [
+        # DatabaseViewer: date range filters and date sorting page through these
+        "CREATE INDEX idx_units2_expiry ON units2 (expiration_date)",
+        "CREATE INDEX idx_blood_requests_date ON blood_requests (request_date)",
+        "CREATE INDEX idx_donor_registration_last_donation ON donor_registration (last_donation_date)",
+    ]),
+    (6, "analytics covering indexes", [
+        # Analytics_Data: SUM(units_requested) and SUM(quantity_ml) per blood type straight from the index
+        "CREATE INDEX idx_blood_requests_type_units ON blood_requests (blood_type, units_requested)",
+        "CREATE INDEX idx_units2_status_type_quantity ON units2 (status, blood_type, quantity_ml)",
+    ]),
+    (7, "daily inventory snapshots", [
+        # One row per day and blood type, written by Snapshot.py; trend charts read only this
+        """
+        CREATE TABLE IF NOT EXISTS inventory_snapshots (
+            snapshot_date DATE NOT NULL,
+            blood_type VARCHAR(5) NOT NULL,
+            active INT NOT NULL DEFAULT 0,
+            expiring_soon INT NOT NULL DEFAULT 0,
+            used INT NOT NULL DEFAULT 0,
+            delivered INT NOT NULL DEFAULT 0,
+            expired INT NOT NULL DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (snapshot_date, blood_type)
+        )
+        """,
+    ]),
+    (8, "expiry sweeper", [
+        # Sweeper.py: WHERE status = 'active' AND expiration_date <= ? ORDER BY expiration_date
+        "CREATE INDEX idx_units2_status_expiry ON units2 (status, expiration_date)",
+        """
+        CREATE TABLE IF NOT EXISTS expiry_sweeps (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            started_at DATETIME NOT NULL,
+            finished_at DATETIME NOT NULL,
+            cutoff_date DATE NOT NULL,
+            units_expired INT NOT NULL DEFAULT 0,
+            batches INT NOT NULL DEFAULT 0
+        )
+        """,
+    ]),
+    (9, "incremental model retraining", [
+        # Retrain.py: one row per run, promoted or not
+        """
+        CREATE TABLE IF NOT EXISTS model_training_runs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            started_at DATETIME NOT NULL,
+            finished_at DATETIME NOT NULL,
+            from_donor_id INT,
+            to_donor_id INT,
+            train_rows INT NOT NULL DEFAULT 0,
+            holdout_rows INT NOT NULL DEFAULT 0,
+            current_accuracy FLOAT,
+            candidate_accuracy FLOAT,
+            trees INT,
+            promoted TINYINT NOT NULL DEFAULT 0,
+            note VARCHAR(200)
+        )
+        """,
+    ]),
+    (10, "donor eligibility label source", [
+        # 'model' when elgibility is the model's own prediction (donation form); NULL when it came
+        # with the data (bulk import, rows from before this column). Retrain.py learns only from NULL.
+        "ALTER TABLE donor_registration ADD COLUMN eligibility_source VARCHAR(20)",
+    ]),
+]
+
+ER_DUP_KEYNAME = 1061
+ER_DUP_FIELDNAME = 1060
+
+_migrated = False
+
+
+def run_migrations():
+    global _migrated
+    import mysql.connector
+    if _migrated:
+        return True
+
+    connection = cursor = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+
+        # Serialize concurrent app starts so each migration runs exactly once
+        # (the embedded backends have a single writer and need no named lock)
+        locking = is_mysql()
+        if locking:
+            cursor.execute("SELECT GET_LOCK('blood_bank_migrations', 30)")
+            if cursor.fetchone()[0] != 1:
+                print("❌ Timed out waiting for another process to finish migrating")
+                return False
+
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(200),
+                    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cursor.fetchall()}
+
+            for version, description, statements in MIGRATIONS:
+                if version in applied:
+                    continue
+                for statement in statements:
+                    try:
+                        cursor.execute(statement)
+                    except mysql.connector.Error as err:
+                        # DDL commits implicitly, so a retried migration may find its own index/column
+                        if err.errno not in (ER_DUP_KEYNAME, ER_DUP_FIELDNAME):
+                            raise
+                cursor.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                               (version, description))
+                connection.commit()
+                print(f"✅ Applied migration {version}: {description}")
+        finally:
+            if locking:
+                cursor.execute("SELECT RELEASE_LOCK('blood_bank_migrations')")
+                cursor.fetchall()
+
+        _migrated = True
+        print("✅ Database schema up to date")
+        return True
+    except mysql.connector.Error as err:
+        print(f"❌ Database migration error: {err}")
+        return False
+    finally:
+        release(connection, cursor)
+
+
+if __name__ == "__main__":
+    run_migrations()
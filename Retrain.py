@@ -0,0 +1,200 @@
+import copy
+import time
+import argparse
+from datetime import datetime
+import mysql.connector
+from Database import get_connection, release
+from Migrations import run_migrations
+
+# Folds donors registered since the last checkpoint into the eligibility model without
+# retraining on the full history: a few new trees are fitted on the new rows only and
+# appended to the forest (the oldest trees drop off past MAX_TREES). The candidate replaces
+# the saved model only if its accuracy on a fixed held-out slice of donor_registration holds.
+# The checkpoint is the highest donor_id the saved model has folded in or passed over
+# (trained_through).
+#
+# Only rows whose label was assessed outside the app are learnt from: bulk-imported donor
+# records. Donors registered through the donation form carry the model's own prediction
+# (eligibility_source = 'model'), so they are neither trained on nor used to judge a candidate.
+TREES_PER_UPDATE = 20
+MAX_TREES = 300
+MIN_NEW_ROWS = 30
+# Most rows folded in per run; a long backlog is caught up over several runs
+MAX_ROWS_PER_UPDATE = 50000
+# Every HOLDOUT_MODULUS-th donor_id is never trained on and is used only for evaluation
+HOLDOUT_MODULUS = 5
+HOLDOUT_WINDOW = 5000
+MIN_HOLDOUT_ROWS = 20
+# How much held-out accuracy a candidate may lose and still be promoted
+PROMOTION_TOLERANCE = 0.01
+MODEL_LABELLED = 'model'
+
+LABELS = {'Eligible': 1, 'Not Eligible': 0, '1': 1, '0': 0, 1: 1, 0: 0}
+DONOR_COLUMNS = ['donor_id', 'age', 'gender', 'hemoglobin_count', 'weight', 'pulse_rate', 'blood_pressure',
+                 'chronic_disorders', 'last_donation_date', 'elgibility']
+
+
+def _fetch(cursor, where, params, order, limit):
+    import pandas as pd
+    cursor.execute(f"""
+        SELECT {', '.join(DONOR_COLUMNS)}
+        FROM donor_registration
+        WHERE {where}
+        AND (eligibility_source IS NULL OR eligibility_source <> %s)
+        ORDER BY donor_id {order}
+        LIMIT %s
+    """, (*params, MODEL_LABELLED, limit))
+    return pd.DataFrame(cursor.fetchall(), columns=DONOR_COLUMNS)
+
+
+def load_new_donors(cursor, after_id, limit=MAX_ROWS_PER_UPDATE):
+    # Training rows registered after the checkpoint; a primary key range scan
+    return _fetch(cursor, "donor_id > %s AND MOD(donor_id, %s) <> 0", (after_id or 0, HOLDOUT_MODULUS),
+                  'ASC', limit)
+
+
+def load_holdout(cursor, window=HOLDOUT_WINDOW):
+    # The most recent held-out donors, so evaluation cost stays flat as history grows
+    return _fetch(cursor, "MOD(donor_id, %s) = 0", (HOLDOUT_MODULUS,), 'DESC', window)
+
+
+def to_training_set(df, columns):
+    # Same features as BloodDonorPredictor.train; rows without a usable label or field are dropped
+    from Donor_Model import build_features
+    labels = df['elgibility'].map(LABELS)
+    features = build_features(df)[columns]
+    usable = features.notna().all(axis=1) & labels.notna()
+    return features[usable].astype('float64'), labels[usable].astype(int)
+
+
+def extend_forest(model, X, y, seed):
+    # New trees fitted on the new rows only, appended to a copy of the current forest;
+    # the current model's trees are shared, not copied
+    from sklearn.ensemble import RandomForestClassifier
+    extra = RandomForestClassifier(n_estimators=TREES_PER_UPDATE, random_state=seed, n_jobs=-1)
+    extra.fit(X, y)
+    candidate = copy.copy(model)
+    candidate.estimators_ = (list(model.estimators_) + list(extra.estimators_))[-MAX_TREES:]
+    candidate.n_estimators = len(candidate.estimators_)
+    return candidate
+
+
+def _record_run(cursor, connection, started_at, run):
+    cursor.execute("""
+        INSERT INTO model_training_runs
+        (started_at, finished_at, from_donor_id, to_donor_id, train_rows, holdout_rows,
+         current_accuracy, candidate_accuracy, trees, promoted, note)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (started_at, datetime.now(), run['from_donor_id'], run['to_donor_id'], run['train_rows'],
+          run['holdout_rows'], run['current_accuracy'], run['candidate_accuracy'], run['trees'],
+          int(run['promoted']), run['note']))
+    connection.commit()
+
+
+def retrain_incremental(model_path=None, data_path=None):
+    # Returns the promoted BloodDonorPredictor, or None when the saved model was kept
+    from sklearn.metrics import accuracy_score
+    from Donor_Model import BloodDonorPredictor, DONOR_DATA_PATH, MODEL_PATH
+    model_path = model_path or MODEL_PATH
+    started_at = datetime.now()
+    start = time.perf_counter()
+
+    current = BloodDonorPredictor()
+    current.load_or_train(data_path or DONOR_DATA_PATH, model_path)
+    run = {'from_donor_id': current.trained_through, 'to_donor_id': None, 'train_rows': 0, 'holdout_rows': 0,
+           'current_accuracy': None, 'candidate_accuracy': None, 'trees': len(current.model.estimators_),
+           'promoted': False, 'note': None}
+
+    connection = cursor = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+        new_rows = load_new_donors(cursor, current.trained_through)
+        X_new, y_new = to_training_set(new_rows, current.columns)
+        run['train_rows'] = len(X_new)
+        if not new_rows.empty:
+            run['to_donor_id'] = int(new_rows['donor_id'].max())
+        # A full window will read the same rows next time; if they cannot be used now they
+        # never can, and waiting on them would stall every later registration
+        window_full = len(new_rows) >= MAX_ROWS_PER_UPDATE
+
+        candidate = None
+        pass_over = False
+        if len(X_new) < MIN_NEW_ROWS:
+            run['note'] = f"{len(X_new)} usable new rows, waiting for {MIN_NEW_ROWS}"
+            pass_over = window_full
+        elif set(y_new) != set(current.model.classes_):
+            # New trees must know every class or their votes cannot be averaged with the rest
+            run['note'] = "new rows hold only one eligibility class"
+            pass_over = window_full
+        else:
+            X_holdout, y_holdout = to_training_set(load_holdout(cursor), current.columns)
+            run['holdout_rows'] = len(X_holdout)
+            if len(X_holdout) < MIN_HOLDOUT_ROWS:
+                run['note'] = f"{len(X_holdout)} held-out rows, need {MIN_HOLDOUT_ROWS} to judge a candidate"
+            else:
+                candidate = extend_forest(current.model, X_new, y_new, seed=run['to_donor_id'])
+                run['trees'] = len(candidate.estimators_)
+                run['current_accuracy'] = float(accuracy_score(y_holdout, current.model.predict(X_holdout)))
+                run['candidate_accuracy'] = float(accuracy_score(y_holdout, candidate.predict(X_holdout)))
+                if run['candidate_accuracy'] + PROMOTION_TOLERANCE < run['current_accuracy']:
+                    # The same rows would build the same candidate again
+                    run['note'] = "held-out accuracy dropped"
+                    candidate = None
+                    pass_over = True
+
+        promoted = None
+        if candidate is not None:
+            promoted = current.clone()
+            promoted.model = candidate
+            promoted.compiled = None
+            promoted.accuracy = run['candidate_accuracy']
+            promoted.trained_through = run['to_donor_id']
+            promoted.trained_at = datetime.now().isoformat(timespec='seconds')
+            # Keeps the CSV's data_hash, so load_or_train does not throw the increments away
+            promoted.save_model(model_path)
+            run['promoted'] = True
+            run['note'] = "promoted"
+        elif pass_over:
+            # Keep the model, move the checkpoint past rows it will never learn from
+            current.trained_through = run['to_donor_id']
+            current.save_model(model_path)
+            run['note'] += f"; passed over donors through id {run['to_donor_id']}"
+
+        _record_run(cursor, connection, started_at, run)
+        elapsed = time.perf_counter() - start
+        if promoted is not None:
+            print(f"✅ Model updated with {run['train_rows']} new donors through id {run['to_donor_id']} "
+                  f"(held-out accuracy {run['current_accuracy']:.3f} -> {run['candidate_accuracy']:.3f}, "
+                  f"{run['trees']} trees) in {elapsed:.2f}s")
+        else:
+            print(f"⚠ Model kept: {run['note']} ({elapsed:.2f}s)")
+        return promoted
+    except mysql.connector.Error as err:
+        if connection is not None:
+            connection.rollback()
+        print(f"❌ Retraining stopped: {err}")
+        return None
+    finally:
+        release(connection, cursor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fold newly registered donors into the eligibility model")
+    parser.add_argument('--model', default=None, help="model artifact to update (default: models/eligibility_model.joblib)")
+    parser.add_argument('--data', default=None, help="CSV to train from if there is no saved model yet")
+    parser.add_argument('--interval', type=float, default=None,
+                        help="keep running, retraining every INTERVAL seconds (default: once)")
+    args = parser.parse_args(argv)
+
+    if not run_migrations():
+        return
+    while True:
+        retrain_incremental(args.model, args.data)
+        if args.interval is None:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
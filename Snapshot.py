@@ -0,0 +1,79 @@
+import argparse
+from datetime import datetime, timedelta
+from Database import get_connection, release
+from Migrations import run_migrations
+from Analytics_Data import mark_changed
+
+# A unit counts as "expiring soon" when it is active and expires within this many days
+EXPIRING_WINDOW_DAYS = 7
+
+
+def take_snapshot(cursor, connection, snapshot_date=None, expiring_days=EXPIRING_WINDOW_DAYS):
+    # units2 only knows each unit's current status, so a snapshot can only record today's
+    # picture; running it again the same day overwrites that day's rows. Active units past
+    # their expiration date count as expired even before anyone marks them.
+    snapshot_date = snapshot_date or datetime.today().date()
+    soon = snapshot_date + timedelta(days=expiring_days)
+    # Only status, blood_type and expiration_date are read, all in idx_units2_status_type_expiry
+    cursor.execute("""
+        SELECT blood_type,
+               SUM(status = 'active' AND expiration_date > %s),
+               SUM(status = 'active' AND expiration_date > %s AND expiration_date <= %s),
+               SUM(status = 'used'),
+               SUM(status = 'delivered'),
+               SUM(status = 'expired' OR (status = 'active' AND expiration_date <= %s))
+        FROM units2
+        WHERE blood_type IS NOT NULL
+        GROUP BY blood_type
+    """, (snapshot_date, snapshot_date, soon, snapshot_date))
+    rows = [(snapshot_date, blood_type, *(int(count or 0) for count in counts))
+            for blood_type, *counts in cursor.fetchall()]
+
+    cursor.executemany("""
+        INSERT INTO inventory_snapshots (snapshot_date, blood_type, active, expiring_soon, used, delivered, expired)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE active = VALUES(active), expiring_soon = VALUES(expiring_soon),
+            used = VALUES(used), delivered = VALUES(delivered), expired = VALUES(expired)
+    """, rows)
+    connection.commit()
+    mark_changed('inventory_snapshots')
+    return rows
+
+
+def run_snapshot(expiring_days=EXPIRING_WINDOW_DAYS):
+    import mysql.connector
+    connection = cursor = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+
+        cursor.execute("SELECT MAX(snapshot_date) FROM inventory_snapshots")
+        last = cursor.fetchone()[0]
+        today = datetime.today().date()
+        if last is not None and (today - last).days > 1:
+            print(f"⚠ No snapshots between {last} and {today}; those days cannot be reconstructed")
+
+        rows = take_snapshot(cursor, connection, today, expiring_days)
+        print(f"✅ Inventory snapshot for {today} saved ({len(rows)} blood types)")
+        return True
+    except mysql.connector.Error as err:
+        if connection is not None:
+            connection.rollback()
+        print(f"❌ Could not take inventory snapshot: {err}")
+        return False
+    finally:
+        release(connection, cursor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record today's per-blood-type stock in inventory_snapshots "
+                                                 "(schedule daily, e.g. from cron)")
+    parser.add_argument('--expiring-days', type=int, default=EXPIRING_WINDOW_DAYS)
+    args = parser.parse_args(argv)
+
+    if run_migrations():
+        run_snapshot(args.expiring_days)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+import os
+import re
+import abc
+import time
+import sqlite3
+import datetime
+import threading
+from Metrics import instrument_connection
+
+# Which database the app talks to: the MySQL server (default), an embedded SQLite file for
+# sites without a database server, or a private in-memory database for tests and benchmarks.
+STORAGE_BACKEND = os.environ.get('BLOOD_BANK_STORAGE', 'mysql')
+SQLITE_PATH = os.environ.get('BLOOD_BANK_SQLITE_PATH', 'blood_bank.db')
+# How long a SQLite writer waits for another one before failing
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('BLOOD_BANK_SQLITE_BUSY_TIMEOUT', 30))
+# First pause before retrying a statement that hit a shared-cache table lock; doubles up to 50 ms
+SQLITE_LOCKED_BACKOFF = 0.001
+
+# MySQL error numbers the callers already handle, used for the matching SQLite failures
+ER_DUP_FIELDNAME = 1060
+ER_DUP_KEYNAME = 1061
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_LOCK_DEADLOCK = 1213
+
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(sep=' '))
+
+# The app's SQL is written for MySQL with %s placeholders; these rewrite the handful of
+# MySQL-only constructs it uses into SQLite.
+_SQLITE_REWRITES = [
+    (re.compile(r"\bINT AUTO_INCREMENT PRIMARY KEY", re.I), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\s+ON UPDATE CURRENT_TIMESTAMP", re.I), ""),
+    (re.compile(r"UNIQUE KEY \w+ \(", re.I), "UNIQUE ("),
+    (re.compile(r"\s+FOR UPDATE(\s+SKIP LOCKED)?", re.I), ""),
+    (re.compile(r"ON DUPLICATE KEY UPDATE", re.I), "ON CONFLICT DO UPDATE SET"),
+    (re.compile(r"VALUES\((\w+)\)", re.I), r"excluded.\1"),
+    (re.compile(r"SHOW COLUMNS FROM (\w+)", re.I), r"SELECT name FROM pragma_table_info('\1')"),
+    (re.compile(r"CURDATE\(\)\s*-\s*INTERVAL\s+%s\s+DAY", re.I), "date('now', 'localtime', '-' || %s || ' days')"),
+    (re.compile(r"%s"), "?"),
+]
+_LOCKING_READ = re.compile(r"\bFOR UPDATE\b", re.I)
+_translated = {}
+
+
+def translate_sql(sql):
+    # Statements are a small fixed set, so each is translated once
+    translated = _translated.get(sql)
+    if translated is None:
+        translated = sql
+        for pattern, replacement in _SQLITE_REWRITES:
+            translated = pattern.sub(replacement, translated)
+        _translated[sql] = translated
+    return translated
+
+
+def _to_python(value):
+    # SQLite hands DATE/DATETIME back as text; the app compares them with date objects
+    if isinstance(value, str) and len(value) in (10, 19) and value[4:5] == '-' and value[7:8] == '-':
+        try:
+            if len(value) == 10:
+                return datetime.date.fromisoformat(value)
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _date_part(index):
+    def part(value):
+        return int(str(value)[:10].split('-')[index]) if value else None
+    return part
+
+
+def _add_mysql_functions(raw):
+    # MySQL functions the app's SQL calls that SQLite lacks
+    raw.create_function("YEAR", 1, _date_part(0), deterministic=True)
+    raw.create_function("MONTH", 1, _date_part(1), deterministic=True)
+    raw.create_function("MOD", 2, lambda a, b: None if a is None or b is None else a % b, deterministic=True)
+    raw.create_function("CURDATE", 0, lambda: datetime.date.today().isoformat())
+
+
+def _table_locked(err):
+    # SQLITE_LOCKED: a table lock held by another connection to the shared-cache in-memory
+    # database. Unlike SQLITE_BUSY it is returned at once, the busy timeout does not apply.
+    code = getattr(err, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff == sqlite3.SQLITE_LOCKED
+    return 'table is locked' in str(err) or 'schema is locked' in str(err)
+
+
+def _retry_locked(operation, *args):
+    # Only one shared-cache connection writes at a time and reads outside a transaction
+    # release their locks when they finish, so the lock holder always gets to commit;
+    # waiting it out (up to the busy timeout) cannot deadlock. A statement that fails here
+    # has changed nothing, so it is safe to run again.
+    deadline = time.monotonic() + SQLITE_BUSY_TIMEOUT
+    pause = SQLITE_LOCKED_BACKOFF
+    while True:
+        try:
+            return operation(*args)
+        except sqlite3.OperationalError as err:
+            if not _table_locked(err) or time.monotonic() >= deadline:
+                raise
+        time.sleep(pause)
+        pause = min(pause * 2, 0.05)
+
+
+def _as_mysql_error(err):
+    # Callers catch mysql.connector.Error and look at errno, so SQLite failures are reported the same way
+    import mysql.connector
+    message = str(err)
+    errno = None
+    if 'already exists' in message:
+        errno = ER_DUP_KEYNAME
+    elif 'duplicate column' in message:
+        errno = ER_DUP_FIELDNAME
+    elif 'table is locked' in message:
+        # Shared-cache conflict between two in-memory connections; retried like a deadlock
+        errno = ER_LOCK_DEADLOCK
+    elif 'locked' in message or 'busy' in message:
+        errno = ER_LOCK_WAIT_TIMEOUT
+    return mysql.connector.errors.DatabaseError(msg=message, errno=errno)
+
+
+class SQLiteCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection.raw.cursor()
+
+    def execute(self, sql, params=()):
+        try:
+            if _LOCKING_READ.search(sql) and not self.connection.raw.in_transaction:
+                # SQLite has no row locks; take the write lock up front so the read-then-update
+                # that FOR UPDATE protects in MySQL cannot interleave with another writer
+                _retry_locked(self._cursor.execute, "BEGIN IMMEDIATE")
+            _retry_locked(self._cursor.execute, translate_sql(sql), tuple(params or ()))
+        except sqlite3.Error as err:
+            raise _as_mysql_error(err) from err
+
+    def executemany(self, sql, rows):
+        try:
+            _retry_locked(self._cursor.executemany, translate_sql(sql), [tuple(row) for row in rows])
+        except sqlite3.Error as err:
+            raise _as_mysql_error(err) from err
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return tuple(_to_python(value) for value in row) if row is not None else None
+
+    def fetchall(self):
+        return [tuple(_to_python(value) for value in row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size or self._cursor.arraysize)
+        return [tuple(_to_python(value) for value in row) for row in rows]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    # Looks enough like a mysql.connector connection for the app: %s SQL, commit/rollback,
+    # close() that only ends the transaction (the connection is kept per thread, like a pool)
+    def __init__(self, raw):
+        self.raw = raw
+
+    def cursor(self):
+        return SQLiteCursor(self)
+
+    def commit(self):
+        try:
+            _retry_locked(self.raw.commit)
+        except sqlite3.Error as err:
+            raise _as_mysql_error(err) from err
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        if self.raw.in_transaction:
+            self.raw.rollback()
+
+
+class Storage(abc.ABC):
+    # Repository operations for donors, units and requests. The transactional paths
+    # (allocation, dispatch, sweeping) keep their own SQL and run through connect().
+    name = None
+
+    @abc.abstractmethod
+    def connect(self, timeout=None):
+        ...
+
+    @abc.abstractmethod
+    def release(self, connection, cursor=None):
+        ...
+
+    def _insert(self, sql, rows):
+        import mysql.connector
+        connection = cursor = None
+        try:
+            # Timed like every statement that goes through Database.get_connection
+            connection = instrument_connection(self.connect())
+            cursor = connection.cursor()
+            ids = []
+            for row in rows:
+                cursor.execute(sql, row)
+                ids.append(cursor.lastrowid)
+            connection.commit()
+            return ids
+        except mysql.connector.Error:
+            if connection is not None:
+                connection.rollback()
+            raise
+        finally:
+            self.release(connection, cursor)
+
+    def add_donor(self, donor):
+        # donor: column -> value for donor_registration; returns the new donor_id
+        columns = list(donor)
+        sql = (f"INSERT INTO donor_registration ({', '.join(columns)}) "
+               f"VALUES ({', '.join(['%s'] * len(columns))})")
+        return self._insert(sql, [[donor[column] for column in columns]])[0]
+
+    def add_unit(self, donor_id, blood_type, quantity_ml, donation_date, expiration_date, status='active'):
+        return self._insert("""
+            INSERT INTO units2 (donor_id, blood_type, quantity_ml, donation_date, expiration_date, status)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, [(donor_id, blood_type, quantity_ml, donation_date, expiration_date, status)])[0]
+
+    def add_requests(self, location, hospital_name, contact_number, request_date, lines):
+        # lines: [(blood_type, units_requested), ...], stored in one transaction; returns the ids
+        return self._insert("""
+            INSERT INTO blood_requests
+            (location, hospital_name, contact_number, request_date, blood_type, units_requested)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, [(location, hospital_name, contact_number, request_date, blood_type, units)
+              for blood_type, units in lines])
+
+
+class MySQLStorage(Storage):
+    name = 'mysql'
+
+    def connect(self, timeout=None):
+        from Database import get_mysql_connection
+        return get_mysql_connection(timeout)
+
+    def release(self, connection, cursor=None):
+        # Closing a pooled connection hands it back to the pool (and rolls back anything uncommitted)
+        import mysql.connector
+        try:
+            if cursor is not None:
+                cursor.close()
+        except mysql.connector.Error:
+            pass
+        try:
+            if connection is not None:
+                connection.close()
+        except mysql.connector.Error:
+            pass
+
+
+class SQLiteStorage(Storage):
+    # Embedded database file in WAL mode: readers never block the writer. One connection
+    # per thread, reused the way the MySQL pool reuses connections.
+    name = 'sqlite'
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self.local = threading.local()
+
+    def _open(self):
+        raw = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+        raw.execute("PRAGMA journal_mode=WAL")
+        raw.execute("PRAGMA synchronous=NORMAL")
+        raw.execute("PRAGMA foreign_keys=ON")
+        _add_mysql_functions(raw)
+        return raw
+
+    def connect(self, timeout=None):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = SQLiteConnection(self._open())
+        return connection
+
+    def release(self, connection, cursor=None):
+        if cursor is not None:
+            cursor.close()
+        if connection is not None:
+            connection.close()
+
+
+class MemoryStorage(SQLiteStorage):
+    # A private in-memory SQLite database shared by this process's threads; gone on exit
+    name = 'memory'
+
+    def __init__(self):
+        super().__init__(f"file:blood_bank_{id(self)}?mode=memory&cache=shared")
+        # The database lives as long as one connection to it is open
+        self._anchor = self._open()
+
+    def _open(self):
+        raw = sqlite3.connect(self.path, uri=True, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+        _add_mysql_functions(raw)
+        return raw
+
+
+STORAGE_BACKENDS = {
+    'mysql': MySQLStorage,
+    'sqlite': SQLiteStorage,
+    'memory': MemoryStorage,
+}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND not in STORAGE_BACKENDS:
+                raise ValueError(f"Unknown BLOOD_BANK_STORAGE '{STORAGE_BACKEND}', "
+                                 f"expected one of {', '.join(STORAGE_BACKENDS)}")
+            _storage = STORAGE_BACKENDS[STORAGE_BACKEND]()
+            if _storage.name != 'mysql':
+                print(f"✅ Using {_storage.name} storage")
+    return _storage
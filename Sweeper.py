@@ -0,0 +1,86 @@
+import time
+import argparse
+from datetime import datetime
+from Database import get_connection, release
+from Migrations import run_migrations
+from Inventory import get_ledger
+from Analytics_Data import mark_changed
+
+# Units per transaction; keeps each batch's row locks short
+SWEEP_BATCH_SIZE = 1000
+
+
+def sweep_expired(batch_size=SWEEP_BATCH_SIZE, today=None):
+    # Moves active units whose expiration_date has passed to 'expired', one bounded batch per
+    # transaction. SKIP LOCKED leaves units an allocation is holding alone; if that allocation
+    # rolls back they are picked up by the next run.
+    import mysql.connector
+    today = today or datetime.today().date()
+    started_at = datetime.now()
+    total = batches = 0
+
+    connection = cursor = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+        while True:
+            cursor.execute("""
+                SELECT blood_id
+                FROM units2
+                WHERE status = 'active' AND expiration_date <= %s
+                ORDER BY expiration_date
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (today, batch_size))
+            blood_ids = [row[0] for row in cursor.fetchall()]
+            if not blood_ids:
+                connection.commit()
+                break
+
+            placeholders = ', '.join(['%s'] * len(blood_ids))
+            cursor.execute(f"UPDATE units2 SET status = 'expired' WHERE blood_id IN ({placeholders})", blood_ids)
+            connection.commit()
+            get_ledger().remove(blood_ids)
+            total += len(blood_ids)
+            batches += 1
+            if len(blood_ids) < batch_size:
+                break
+
+        cursor.execute("""
+            INSERT INTO expiry_sweeps (started_at, finished_at, cutoff_date, units_expired, batches)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (started_at, datetime.now(), today, total, batches))
+        connection.commit()
+        if total:
+            mark_changed('units2')
+
+        elapsed = (datetime.now() - started_at).total_seconds()
+        print(f"✅ Expiry sweep: {total} units marked expired in {batches} batches ({elapsed:.2f}s)")
+        return total
+    except mysql.connector.Error as err:
+        if connection is not None:
+            connection.rollback()
+        print(f"❌ Expiry sweep stopped after {total} units: {err}")
+        return None
+    finally:
+        release(connection, cursor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mark expired blood units in units2")
+    parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE)
+    parser.add_argument('--interval', type=float, default=None,
+                        help="keep running, sweeping every INTERVAL seconds (default: sweep once)")
+    args = parser.parse_args(argv)
+
+    if not run_migrations():
+        return
+    while True:
+        sweep_expired(args.batch_size)
+        if args.interval is None:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import time
+import threading
+from Database import get_connection, release
+
+# What the database viewer can browse. Filters and sorting are pushed down to SQL and
+# pages are fetched by key (keyset pagination), so page N costs the same as page 1.
+TABLE_VIEWS = {
+    'donor_registration': {'key': 'donor_id', 'date_column': 'last_donation_date', 'statuses': []},
+    'blood_requests': {'key': 'id', 'date_column': 'request_date',
+                       'statuses': ['pending', 'approved', 'completed']},
+    'units2': {'key': 'blood_id', 'date_column': 'expiration_date',
+               'statuses': ['active', 'used', 'delivered', 'expired']},
+}
+PAGE_SIZE = 200
+# COUNT(*) over millions of rows is the slowest query here, so totals are reused for a while
+COUNT_CACHE_SECONDS = 60
+
+_columns = {}
+_counts = {}
+_cache_lock = threading.Lock()
+
+
+def _query(sql, params=()):
+    connection = cursor = None
+    try:
+        connection = get_connection()
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        release(connection, cursor)
+
+
+def get_columns(table):
+    if table not in TABLE_VIEWS:
+        raise ValueError(f"Unknown table: {table}")
+    with _cache_lock:
+        if table in _columns:
+            return _columns[table]
+    columns = [row[0] for row in _query(f"SHOW COLUMNS FROM {table}")]
+    with _cache_lock:
+        _columns[table] = columns
+    return columns
+
+
+def build_filters(table, filters):
+    # filters: blood_type, status, date_from, date_to (YYYY-MM-DD); empty values are ignored
+    spec = TABLE_VIEWS[table]
+    clauses, params = [], []
+    if filters.get('blood_type'):
+        clauses.append("blood_type = %s")
+        params.append(filters['blood_type'])
+    if filters.get('status') and spec['statuses']:
+        clauses.append("status = %s")
+        params.append(filters['status'])
+    if filters.get('date_from'):
+        clauses.append(f"{spec['date_column']} >= %s")
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        clauses.append(f"{spec['date_column']} <= %s")
+        params.append(filters['date_to'])
+    return clauses, params
+
+
+def _after_clause(sort_column, key, descending, after):
+    # Rows strictly past (last_value, last_key) in ORDER BY sort_column, key.
+    # MySQL sorts NULLs first ascending and last descending.
+    last_value, last_key = after
+    op = '<' if descending else '>'
+    if sort_column == key:
+        return f"{key} {op} %s", [last_key]
+    if last_value is None:
+        if descending:
+            return f"({sort_column} IS NULL AND {key} < %s)", [last_key]
+        return f"(({sort_column} IS NULL AND {key} > %s) OR {sort_column} IS NOT NULL)", [last_key]
+    clause = f"({sort_column} {op} %s OR ({sort_column} = %s AND {key} {op} %s)"
+    clause += f" OR {sort_column} IS NULL)" if descending else ")"
+    return clause, [last_value, last_value, last_key]
+
+
+def sortable_columns(table):
+    # Only indexed columns: the primary key and the date column (migration 5). Sorting by
+    # anything else would filesort the whole table for every page.
+    spec = TABLE_VIEWS[table]
+    return spec['key'], spec['date_column']
+
+
+def build_page_query(table, columns, filters, sort_column=None, descending=False, after=None, page_size=PAGE_SIZE):
+    key = TABLE_VIEWS[table]['key']
+    sort_column = sort_column or key
+    if sort_column not in columns or sort_column not in sortable_columns(table):
+        raise ValueError(f"Cannot sort {table} by {sort_column}")
+
+    clauses, params = build_filters(table, filters)
+    if after is not None:
+        clause, extra = _after_clause(sort_column, key, descending, after)
+        clauses.append(clause)
+        params.extend(extra)
+
+    direction = "DESC" if descending else "ASC"
+    order = f"{key} {direction}" if sort_column == key else f"{sort_column} {direction}, {key} {direction}"
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY {order} LIMIT %s"
+    return sql, params + [page_size]
+
+
+def fetch_page(table, filters, sort_column=None, descending=False, after=None, page_size=PAGE_SIZE):
+    # Returns (columns, rows, next_after); next_after is None on the last page
+    columns = get_columns(table)
+    sql, params = build_page_query(table, columns, filters, sort_column, descending, after, page_size)
+    rows = _query(sql, params)
+    next_after = None
+    if len(rows) == page_size:
+        key = TABLE_VIEWS[table]['key']
+        last = rows[-1]
+        next_after = (last[columns.index(sort_column or key)], last[columns.index(key)])
+    return columns, rows, next_after
+
+
+def count_rows(table, filters, max_age=COUNT_CACHE_SECONDS):
+    cache_key = (table, tuple(sorted((k, v) for k, v in filters.items() if v)))
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _counts.get(cache_key)
+    if cached is not None and now - cached[1] < max_age:
+        return cached[0]
+
+    clauses, params = build_filters(table, filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    total = _query(f"SELECT COUNT(*) FROM {table} {where}", params)[0][0]
+    with _cache_lock:
+        _counts[cache_key] = (total, now)
+    return total
+
+
+def invalidate_counts(table=None):
+    with _cache_lock:
+        for cache_key in [k for k in _counts if table is None or k[0] == table]:
+            del _counts[cache_key]
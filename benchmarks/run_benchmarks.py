@@ -0,0 +1,272 @@
+import os
+import sys
+import io
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import matplotlib
+matplotlib.use('Agg')
+
+# The app's own in-memory storage backend stands in for MySQL
+os.environ.setdefault('BLOOD_BANK_STORAGE', 'memory')
+
+import synthetic_data
+
+# Hot paths timed against synthetic data and an in-process database instead of MySQL.
+# Each result reports call count, throughput and latency percentiles; compare the JSON
+# of two runs to see what a change did.
+
+
+def summarize(latencies, items=None):
+    latencies = np.asarray(latencies, dtype='float64')
+    total = float(latencies.sum())
+    items = items if items is not None else len(latencies)
+    return {
+        'calls': int(len(latencies)),
+        'items': int(items),
+        'total_s': round(total, 4),
+        'throughput_per_s': round(items / total, 1) if total > 0 else None,
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+        'p90_ms': round(float(np.percentile(latencies, 90)) * 1000, 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 3),
+        'max_ms': round(float(latencies.max()) * 1000, 3),
+    }
+
+
+def timed(fn, *args, **kwargs):
+    # The app prints on every call; keep that out of the terminal but inside the timing
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        return time.perf_counter() - start, result
+
+
+def repeat(fn, count):
+    return [timed(fn)[0] for _ in range(count)]
+
+
+def bench_import(paths):
+    from Bulk_Import import import_csv
+    results = {}
+    for kind in ('donors', 'units', 'requests'):
+        elapsed, loaded = timed(import_csv, kind, paths[kind], 10000, True)
+        results[f"import_{kind}"] = summarize([elapsed], items=loaded[0] if loaded else 0)
+    return results
+
+
+def bench_model(paths, train_rows, predict_calls):
+    from Donor_Model import BloodDonorPredictor, build_features
+    train_path = paths['donors']
+    if train_rows:
+        train_path = os.path.join(os.path.dirname(train_path), "train_donors.csv")
+        pd.read_csv(paths['donors'], nrows=train_rows).to_csv(train_path, index=False)
+
+    predictor = BloodDonorPredictor()
+    train_time, _ = timed(predictor.train, train_path)
+    donors = pd.read_csv(paths['donors'])
+    results = {'model_train': summarize([train_time], items=min(train_rows or len(donors), len(donors)))}
+    results['model_train']['accuracy'] = round(float(predictor.accuracy), 4)
+
+    # What the donation form hands over: the eight model inputs for one donor
+    sample = build_features(donors.sample(predict_calls, replace=True, random_state=1))
+    sample = sample[predictor.columns].to_dict('records')
+
+    baseline = []
+    for row in sample:
+        # scikit-learn on a one-row frame, as predict() did before the compiled path
+        baseline.append(timed(predictor.model.predict_proba, pd.DataFrame([row]))[0])
+    results['model_predict_single_sklearn'] = summarize(baseline)
+
+    compile_time, compiled = timed(predictor.compile)
+    results['model_compile'] = summarize([compile_time])
+    results['model_compile']['verified'] = compiled is not None
+
+    latencies = []
+    for row in sample:
+        predictor.user_data = pd.DataFrame([row])
+        latencies.append(timed(predictor.predict)[0])
+    results['model_predict_single'] = summarize(latencies)
+    results['model_screen_single'] = summarize([timed(predictor.screen, row)[0] for row in sample])
+
+    batch_time, _ = timed(predictor.predict_batch, donors)
+    results['model_predict_batch'] = summarize([batch_time], items=len(donors))
+    return results
+
+
+def bench_allocate(connection, calls, lines_per_order=3):
+    # What Submit runs: allocate_requests over one order's new request ids, then over
+    # whatever is still pending, as allocate_pending_requests does
+    from Allocation import allocate_requests
+    cursor = connection.cursor()
+    cursor.execute("SELECT id FROM blood_requests WHERE status = 'pending' ORDER BY id")
+    pending = [row[0] for row in cursor.fetchall()]
+    orders = [pending[i:i + lines_per_order] for i in range(0, len(pending), lines_per_order)][:calls]
+
+    latencies, approved = [], 0
+    for order in orders:
+        elapsed, plan = timed(allocate_requests, cursor, connection, order)
+        latencies.append(elapsed)
+        approved += len(plan.allocations)
+    results = {'allocate_order': summarize(latencies, items=sum(len(order) for order in orders))}
+    results['allocate_order']['approved'] = approved
+
+    cursor.execute("SELECT COUNT(*) FROM blood_requests WHERE status = 'pending'")
+    backlog = cursor.fetchone()[0]
+    elapsed, plan = timed(allocate_requests, cursor, connection)
+    results['allocate_backlog'] = summarize([elapsed], items=backlog)
+    results['allocate_backlog']['approved'] = len(plan.allocations)
+    cursor.close()
+    return results
+
+
+def bench_dispatch(connection):
+    from Blood_Request import dispatch_approved_requests, QRCodeGenerator
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM blood_requests WHERE status = 'approved'")
+    approved = cursor.fetchone()[0]
+    cursor.close()
+
+    dispatch_time, (completed, labels) = timed(dispatch_approved_requests)
+    results = {'process_approved_requests_db': summarize([dispatch_time], items=len(completed))}
+    render_time, _ = timed(QRCodeGenerator.generate_batch, labels, "qr_codes")
+    results['process_approved_requests_labels'] = summarize([render_time], items=len(labels))
+    results['process_approved_requests_db']['approved_before'] = approved
+    return results
+
+
+def bench_qr(calls):
+    # QRCodeGenerator.generate minus its Tk popup: one label rendered and saved per call
+    from Blood_Request import render_qr_label
+    os.makedirs("qr_single", exist_ok=True)
+    latencies = []
+    for i in range(calls):
+        data = f"Blood Bank: LifeCare Blood Bank\nBlood Type: O+\nExpiration Date: 2026-12-01\nBlood ID: {i}"
+        latencies.append(timed(render_qr_label, (data, f"bench_{i}", "qr_single"))[0])
+    return {'qr_generate': summarize(latencies)}
+
+
+def bench_certificates(calls):
+    from PIL import Image
+    template = os.path.abspath("certificate_template.jpg")
+    Image.new("RGB", (2000, 1414), "white").save(template)
+    # Certificate reads these at import time
+    os.environ['BLOOD_BANK_CERT_TEMPLATE'] = template
+    os.environ['BLOOD_BANK_CERT_FONT'] = os.path.join(matplotlib.get_data_path(), "fonts", "ttf", "DejaVuSans.ttf")
+    from Certificate import CertificateGenerator
+
+    cold, _ = timed(CertificateGenerator.generate, "Cold Start", "O+", "2026-01-01", 450, show=False)
+    latencies = [timed(CertificateGenerator.generate, f"Donor {i}", "A+", "2026-01-01", 450, show=False)[0]
+                 for i in range(calls)]
+    result = summarize(latencies)
+    result['first_call_ms'] = round(cold * 1000, 3)
+    return {'certificate_generate': result}
+
+
+def bench_analytics(data_dir, calls):
+    import Analytics_Data
+    for name in Analytics_Data.DATASETS:
+        os.environ[Analytics_Data.DATASETS[name]['env']] = os.path.join(
+            data_dir, Analytics_Data.DATASETS[name]['file'])
+
+    results = {}
+    aggregates = {
+        'donors_by_blood_type': Analytics_Data.donors_by_blood_type,
+        'donations_by_month': Analytics_Data.donations_by_month,
+        'requested_vs_available': Analytics_Data.requested_vs_available,
+    }
+    cold, _ = timed(lambda: [fn('csv') for fn in aggregates.values()])
+    results['analytics_csv_cold_load'] = summarize([cold])
+    for name, fn in aggregates.items():
+        results[f"analytics_csv_{name}"] = summarize(repeat(lambda: fn('csv'), calls))
+        results[f"analytics_sql_{name}"] = summarize(repeat(lambda: fn('mysql'), calls))
+    return results
+
+
+def run(rows, work_dir, train_rows, calls, skip):
+    os.makedirs(work_dir, exist_ok=True)
+    os.chdir(work_dir)
+    results = {}
+
+    start = time.perf_counter()
+    paths = synthetic_data.generate(os.path.join(work_dir, "data"), rows, rows, rows)
+    results['generate_data'] = summarize([time.perf_counter() - start], items=3 * rows)
+
+    from Database import get_connection
+    from Migrations import run_migrations
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not run_migrations():
+            raise SystemExit("❌ Could not create the benchmark schema")
+    connection = get_connection()
+
+    steps = [
+        ('import', lambda: bench_import(paths)),
+        ('model', lambda: bench_model(paths, train_rows, calls)),
+        ('allocate', lambda: bench_allocate(connection, calls)),
+        ('dispatch', lambda: bench_dispatch(connection)),
+        ('qr', lambda: bench_qr(calls)),
+        ('certificate', lambda: bench_certificates(calls)),
+        ('analytics', lambda: bench_analytics(os.path.join(work_dir, "data"), calls)),
+    ]
+    for name, step in steps:
+        if name in skip:
+            continue
+        print(f"... {name}", file=sys.stderr)
+        results.update(step())
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the blood bank hot paths on synthetic data, offline")
+    parser.add_argument('--rows', type=int, default=10000, help="rows per synthetic CSV (10k up to millions)")
+    parser.add_argument('--train-rows', type=int, default=None,
+                        help="cap the donors used for model training (default: all)")
+    parser.add_argument('--calls', type=int, default=200, help="calls per latency benchmark")
+    parser.add_argument('--skip', nargs='*', default=[],
+                        choices=['import', 'model', 'allocate', 'dispatch', 'qr', 'certificate', 'analytics'])
+    parser.add_argument('--work-dir', default=None, help="where data and rendered files go (default: temp dir)")
+    parser.add_argument('--output', default=None, help="write the JSON report here as well as to stdout")
+    parser.add_argument('--metrics', default=None,
+                        help="also write the app's own operation/query timings here (.json or Prometheus text)")
+    args = parser.parse_args(argv)
+
+    work_dir = os.path.abspath(args.work_dir or tempfile.mkdtemp(prefix="blood_bank_bench_"))
+    # run() changes into work_dir; keep the output paths relative to where we were started
+    output = os.path.abspath(args.output) if args.output else None
+    metrics_path = os.path.abspath(args.metrics) if args.metrics else None
+    started = time.time()
+    results = run(args.rows, work_dir, args.train_rows, args.calls, set(args.skip))
+    report = {
+        'meta': {
+            'rows': args.rows,
+            'train_rows': args.train_rows,
+            'calls': args.calls,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+            'work_dir': work_dir,
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text)
+    if metrics_path:
+        import Metrics
+        Metrics.export(metrics_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Startup gate: launching the app until its main menu is drawn must stay under the budget,
+# and importing the menu module must not load any of the heavy libraries, which belong to
+# the features that use them. Exits non-zero when either check fails, so it can run in CI
+# or a pre-commit hook. Without a display only the import is timed.
+STARTUP_MODULE = 'Main_Menu(Donor)'
+STARTUP_SCRIPT = os.path.join(ROOT, 'Main_Menu(Donor).py')
+FIRST_PAINT_MARKER = "first paint"
+STARTUP_BUDGET_MS = float(os.environ.get('BLOOD_BANK_STARTUP_BUDGET_MS', 400))
+HEAVY_MODULES = ['mysql', 'pandas', 'numpy', 'sklearn', 'scipy', 'joblib', 'PIL', 'qrcode', 'matplotlib', 'seaborn', 'cv2']
+# Loaded on first use (or by the background preload); timed for the report, not gated
+FEATURE_MODULES = ['Donor_Model', 'Certificate', 'Blood_Request', 'Graph']
+
+_PROBE = """
+import sys, time, json, importlib
+start = time.perf_counter()
+importlib.import_module({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms': elapsed * 1000, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def measure(module, env=None):
+    output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def has_display():
+    if sys.platform in ('win32', 'darwin'):
+        return True
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+def time_to_window(env, timeout=60):
+    # Launch to the menu's first paint, interpreter start-up and Tk included
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, STARTUP_SCRIPT, '--exit-on-first-paint'], cwd=ROOT, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    try:
+        for line in process.stdout:
+            if line.strip() == FIRST_PAINT_MARKER:
+                return (time.perf_counter() - start) * 1000
+        raise RuntimeError(f"the app exited before drawing its window: {process.stderr.read().strip()}")
+    finally:
+        process.kill()
+        process.communicate(timeout=timeout)
+
+
+def slowest_imports(module, top=10):
+    # -X importtime: cumulative microseconds per module, to show where a blown budget went
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import importlib; importlib.import_module({module!r})"],
+                            cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the time to the main menu's first paint and that heavy libraries stay lazy")
+    parser.add_argument('--runs', type=int, default=5, help="fresh launches to time (median is gated)")
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument('--features', action='store_true', help="also time each feature module's first import")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, MPLBACKEND='Agg')
+    imports = [measure(STARTUP_MODULE, env) for _ in range(args.runs)]
+    loaded = [name for name in HEAVY_MODULES if name in imports[0]['modules']]
+    if has_display():
+        median_ms = statistics.median(time_to_window(env) for _ in range(args.runs))
+        print(f"{STARTUP_MODULE}: first paint after median {median_ms:.0f} ms over {args.runs} runs "
+              f"(budget {args.budget_ms:.0f} ms)")
+    else:
+        median_ms = statistics.median(run['ms'] for run in imports)
+        print(f"⚠ No display, timing the import only: median {median_ms:.0f} ms over {args.runs} runs "
+              f"(budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if median_ms > args.budget_ms:
+        failed = True
+        print(f"❌ Startup over budget by {median_ms - args.budget_ms:.0f} ms; slowest imports:")
+        for cumulative, name in slowest_imports(STARTUP_MODULE):
+            print(f"   {cumulative / 1000:8.1f} ms  {name}")
+    if loaded:
+        failed = True
+        print(f"❌ Heavy modules imported at startup: {', '.join(loaded)}")
+
+    if args.features:
+        for module in FEATURE_MODULES:
+            print(f"   first use of {module}: {measure(module, env)['ms']:.0f} ms")
+
+    if failed:
+        return 1
+    print("✅ Startup within budget, heavy modules deferred")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+# Same file names and columns as the CSVs shipped with the app
+DONORS_FILE = "Donor.csv"
+UNITS_FILE = "Blood_units_dataset.csv"
+REQUESTS_FILE = "blood_requests .csv"
+
+BLOOD_TYPES = ['O+', 'A+', 'B+', 'AB+', 'O-', 'A-', 'B-', 'AB-']
+BLOOD_TYPE_SHARE = [0.37, 0.28, 0.20, 0.05, 0.04, 0.03, 0.02, 0.01]
+CITIES = ['Delhi', 'Mumbai', 'Pune', 'Chennai', 'Kolkata', 'Bengaluru', 'Hyderabad', 'Jaipur',
+          'Lucknow', 'Ahmedabad', 'Nagpur', 'Indore', 'Bhopal', 'Patna', 'Karimnagar', 'Surat']
+FIRST_NAMES = ['Ravi', 'Anjali', 'Priya', 'Arjun', 'Sneha', 'Vikram', 'Meera', 'Rahul', 'Kavya', 'Amit']
+LAST_NAMES = ['Kumar', 'Sharma', 'Iyer', 'Patel', 'Reddy', 'Singh', 'Das', 'Nair', 'Gupta', 'Joshi']
+HOSPITALS = ['AIIMS Hospital', 'Lilavati Hospital', 'Apollo Hospital', 'Fortis Hospital',
+             'Government Hospital', 'Manipal Hospital', 'City Care Hospital', 'Ruby Hall Clinic']
+CSV_DATE_FORMAT = '%d-%m-%Y'
+CHUNK_ROWS = 500000
+
+
+def _date_strings(base, offsets):
+    # Formats each distinct day once; strftime over millions of rows is the slow part otherwise
+    days = np.arange(offsets.min(), offsets.max() + 1)
+    labels = (pd.Timestamp(base) + pd.to_timedelta(days, unit='D')).strftime(CSV_DATE_FORMAT).to_numpy()
+    return labels[offsets - days[0]]
+
+
+def _contacts(rng, n):
+    return rng.integers(6_000_000_000, 9_999_999_999, n)
+
+
+def donor_chunk(rng, start_id, n, today):
+    age = rng.integers(18, 66, n)
+    hemoglobin = rng.uniform(8, 18, n).round(1)
+    weight = rng.uniform(40, 100, n).round(1)
+    chronic = (rng.random(n) < 0.15).astype(int)
+    days_since = rng.integers(1, 720, n)
+    # Roughly the rules a clinician would apply, so the model has something to learn
+    eligible = ((hemoglobin >= 12.5) & (weight >= 50) & (chronic == 0) & (days_since >= 90)).astype(int)
+    return pd.DataFrame({
+        'donor_id': np.arange(start_id, start_id + n),
+        'name': pd.Series(rng.choice(FIRST_NAMES, n)) + ' ' + pd.Series(rng.choice(LAST_NAMES, n)),
+        'age': age,
+        'gender': rng.choice(['Male', 'Female'], n),
+        'hemoglobin_count': hemoglobin,
+        'blood_type': rng.choice(BLOOD_TYPES, n, p=BLOOD_TYPE_SHARE),
+        'last_donation_date': _date_strings(today, -days_since),
+        'location': rng.choice(CITIES, n),
+        'contact_number': _contacts(rng, n),
+        'weight': weight,
+        'pulse_rate': rng.integers(0, 2, n),
+        'blood_pressure': rng.integers(0, 2, n),
+        'chronic_disorders': chronic,
+        'elgibility': eligible,
+    })
+
+
+def unit_chunk(rng, start_id, n, today, donor_count):
+    # Donations over the last 60 days with 42-day shelf life: a mix of live and expired bags
+    donated = -rng.integers(0, 60, n)
+    return pd.DataFrame({
+        'blood_id': np.arange(start_id, start_id + n),
+        'donor_id': rng.integers(1, donor_count + 1, n),
+        'blood_type': rng.choice(BLOOD_TYPES, n, p=BLOOD_TYPE_SHARE),
+        'quantity_ml': 500,
+        'donation_date': _date_strings(today, donated),
+        'expiration_date': _date_strings(today, donated + 42),
+        'status': 'active',
+    })
+
+
+def request_chunk(rng, start_id, n, today):
+    return pd.DataFrame({
+        'id': np.arange(start_id, start_id + n),
+        'blood_type': rng.choice(BLOOD_TYPES, n, p=BLOOD_TYPE_SHARE),
+        'request_date': _date_strings(today, -rng.integers(0, 731, n)),
+        'location': rng.choice(CITIES, n),
+        'hospital_name': rng.choice(HOSPITALS, n),
+        'contact_number': _contacts(rng, n),
+        'status': 'pending',
+        'units_requested': rng.integers(1, 6, n),
+    })
+
+
+def _write(path, n, make_chunk):
+    for start in range(0, n, CHUNK_ROWS):
+        make_chunk(start + 1, min(CHUNK_ROWS, n - start)).to_csv(path, mode='w' if start == 0 else 'a',
+                                                                  header=start == 0, index=False)
+    return path
+
+
+def generate(output_dir, donors=10000, units=10000, requests=10000, seed=42, today=None):
+    # Writes the three CSVs in chunks, so millions of rows never sit in memory at once
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp(today or pd.Timestamp.today().normalize())
+    return {
+        'donors': _write(os.path.join(output_dir, DONORS_FILE), donors,
+                         lambda start, n: donor_chunk(rng, start, n, today)),
+        'units': _write(os.path.join(output_dir, UNITS_FILE), units,
+                        lambda start, n: unit_chunk(rng, start, n, today, donors)),
+        'requests': _write(os.path.join(output_dir, REQUESTS_FILE), requests,
+                           lambda start, n: request_chunk(rng, start, n, today)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic donor, unit and request CSVs")
+    parser.add_argument('output_dir')
+    parser.add_argument('--rows', type=int, default=10000, help="rows per file unless overridden")
+    parser.add_argument('--donors', type=int)
+    parser.add_argument('--units', type=int)
+    parser.add_argument('--requests', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    paths = generate(args.output_dir, args.donors or args.rows, args.units or args.rows,
+                     args.requests or args.rows, args.seed)
+    for kind, path in paths.items():
+        print(f"✅ {kind}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import contextlib
+import io
+import threading
+from datetime import date, timedelta
+import pytest
+import Storage
+from Allocation import plan_allocation, allocate_requests
+from Database import get_connection, release
+from Migrations import run_migrations
+
+TODAY = date(2026, 1, 1)
+
+
+def unit(blood_id, blood_type, days=10):
+    return blood_id, blood_type, TODAY + timedelta(days=days)
+
+
+def test_o_negative_is_spent_last():
+    # The A+ request could take either bag; the O- one must be left for the O- patient
+    units = [unit(1, 'O-', days=1), unit(2, 'A+', days=5)]
+    plan = plan_allocation([(10, 'A+', 1), (11, 'O-', 1)], units)
+    assert plan.allocations == {10: [2], 11: [1]}
+    assert plan.unfulfilled == []
+
+
+def test_partial_fit_request_is_left_unfulfilled():
+    units = [unit(1, 'B+'), unit(2, 'B+')]
+    plan = plan_allocation([(10, 'B+', 3), (11, 'B+', 2)], units)
+    assert plan.allocations == {11: [1, 2]}
+    assert plan.unfulfilled == [10]
+
+
+def test_first_expiring_units_are_used_first():
+    units = [unit(1, 'A-', days=30), unit(2, 'A-', days=3), unit(3, 'A-', days=12)]
+    plan = plan_allocation([(10, 'A-', 2)], units)
+    assert plan.allocations == {10: [2, 3]}
+
+
+def test_no_unit_is_given_twice():
+    units = [unit(i, blood_type) for i, blood_type in enumerate(['O-', 'O+', 'A+', 'AB+', 'B-'], start=1)]
+    plan = plan_allocation([(10, 'AB+', 2), (11, 'A+', 2), (12, 'O+', 1), (13, 'B-', 1)], units)
+    claimed = [blood_id for ids in plan.allocations.values() for blood_id in ids]
+    assert len(claimed) == len(set(claimed))
+
+
+@pytest.fixture
+def memory_storage(monkeypatch):
+    storage = Storage.MemoryStorage()
+    monkeypatch.setattr(Storage, '_storage', storage)
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_migrations()
+    return storage
+
+
+def test_concurrent_orders_never_share_a_unit(memory_storage):
+    today = date.today()
+    for blood_type in ('O-', 'A+', 'B+') * 20:
+        memory_storage.add_unit(None, blood_type, 450, today, today + timedelta(days=20))
+
+    errors = []
+
+    def station():
+        connection = get_connection()
+        cursor = connection.cursor()
+        try:
+            for _ in range(8):
+                request_ids = memory_storage.add_requests('L', 'H', '9999999999', str(today),
+                                                          [('A+', 2), ('B+', 1), ('O-', 1)])
+                allocate_requests(cursor, connection, request_ids)
+        except Exception as err:
+            errors.append(err)
+        finally:
+            release(connection, cursor)
+
+    stations = [threading.Thread(target=station) for _ in range(4)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in stations:
+            thread.start()
+        for thread in stations:
+            thread.join()
+    assert errors == []
+
+    connection = get_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT blood_id FROM request_allocations")
+        allocated = [row[0] for row in cursor.fetchall()]
+        assert allocated and len(allocated) == len(set(allocated))
+
+        cursor.execute("""
+            SELECT r.id, r.units_requested, COUNT(a.blood_id)
+            FROM blood_requests r LEFT JOIN request_allocations a ON a.request_id = r.id
+            WHERE r.status = 'approved'
+            GROUP BY r.id, r.units_requested
+        """)
+        approved = cursor.fetchall()
+        assert approved
+        assert all(units_requested == count for _, units_requested, count in approved)
+
+        cursor.execute("SELECT COUNT(*) FROM units2 WHERE status = 'used'")
+        assert cursor.fetchone()[0] == len(allocated)
+    finally:
+        release(connection, cursor)
@@ -0,0 +1,65 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from Donor_Model import BloodDonorPredictor, build_features
+from Compiled_Model import CompiledForest
+
+DONOR_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Donor.csv")
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    predictor = BloodDonorPredictor()
+    predictor.train(DONOR_CSV)
+    return predictor
+
+
+@pytest.fixture(scope="module")
+def donors(predictor):
+    df = pd.read_csv(DONOR_CSV).dropna()
+    return build_features(df)[predictor.columns].astype('float64')
+
+
+def sklearn_proba(model, X):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        return model.predict_proba(np.asarray(X))
+
+
+def test_predict_proba_matches_sklearn(predictor, donors):
+    compiled = CompiledForest.from_sklearn(predictor.model, predictor.columns)
+    np.testing.assert_allclose(compiled.predict_proba(donors), sklearn_proba(predictor.model, donors), rtol=0, atol=1e-9)
+
+
+def test_predict_one_matches_sklearn(predictor, donors):
+    compiled = CompiledForest.from_sklearn(predictor.model, predictor.columns)
+    expected = sklearn_proba(predictor.model, donors)
+    for row, proba in zip(donors.to_numpy(), expected):
+        np.testing.assert_allclose(compiled.predict_one(row), proba, rtol=0, atol=1e-9)
+
+
+def test_screen_matches_sklearn(predictor, donors):
+    compiled = CompiledForest.from_sklearn(predictor.model, predictor.columns)
+    eligible = list(predictor.model.classes_).index(1)
+    for fields, proba in zip(donors.to_dict('records'), sklearn_proba(predictor.model, donors)):
+        eligibility, probability = compiled.screen(fields)
+        assert probability == pytest.approx(proba[eligible], abs=1e-9)
+        expected = predictor.model.classes_[int(np.argmax(proba))] == 1
+        assert eligibility == ("Eligible" if expected else "Not Eligible")
+
+
+def test_probe_rows_around_thresholds_match(predictor):
+    compiled = CompiledForest.from_sklearn(predictor.model, predictor.columns)
+    assert compiled.verify(predictor.model) == 0
+
+
+def test_failed_verification_is_not_retried(predictor, monkeypatch):
+    calls = []
+    monkeypatch.setattr(CompiledForest, 'verify', lambda self, model: calls.append(model) or 1)
+    candidate = predictor.clone()
+    candidate.compiled = None
+    assert candidate.compile() is None
+    assert candidate.compile() is None
+    assert len(calls) == 1
@@ -0,0 +1,16 @@
+import os
+import pytest
+import startup_budget
+
+
+def test_heavy_modules_deferred():
+    modules = startup_budget.measure(startup_budget.STARTUP_MODULE)['modules']
+    assert [name for name in startup_budget.HEAVY_MODULES if name in modules] == []
+
+
+# Wall-clock timings depend on the machine and its load, so the budget is only gated on
+# request (BLOOD_BANK_STARTUP_TEST=1), e.g. on a quiet CI runner with a display
+@pytest.mark.skipif(os.environ.get('BLOOD_BANK_STARTUP_TEST') != '1',
+                    reason="set BLOOD_BANK_STARTUP_TEST=1 to gate the startup budget")
+def test_menu_within_startup_budget():
+    assert startup_budget.main(['--runs', '3']) == 0